@@ -23,8 +23,43 @@ SLOWPRINT_DELAY = 0.04
 CHOICE_TIMEOUT = 1
 BASIC_EVENT_PRINT_DELAY = 0.05
 CONSQ_EVENT_PRINT_DELAY = 0.1
+ANIMATION_FRAME_TIME = 0.1  # seconds between batched writes of animated text
 
 # Event
 BASIC_EVENT_CHANCE = 0.2  # 20%
 DECREASE_SPEED_EVENT_AREA = (1, 5)  # 10% - 50%
-LUCKY_EVENT_LUCK_VALUE = 0.5
\ No newline at end of file
+LUCKY_EVENT_LUCK_VALUE = 0.5
+TIMED_EVENT_INTERVAL = 300  # seconds between wall-clock event checks
+TRAUMA_DURATION = 20  # digs until trauma heals
+BLESS_LUCK_DURATION = 10  # digs with boosted lucky event weight
+BLESS_LUCK_WEIGHT_MULTIPLIER = 3
+
+# Earnings model
+EARNINGS_BUCKETS = 512  # grid points of an income distribution, wider ones are coarsened
+EARNINGS_RUNS = 8  # runs of a minute's digs priced at their own expected balance
+
+# Auto-miner
+AUTO_MINER_TIME_FACTOR = 2  # hired miner digs 2x slower than the player
+
+# Procedural mine
+MINE_CHUNK_SIZE = 64  # cells per chunk
+MINE_LEVEL_WIDTH = 8  # chunks per depth level
+MINE_CACHE_SIZE = 16  # chunks kept in memory
+MINE_TUNNEL_CHANCE = 0.15
+MINE_DEPTH_BONUS = 0.1  # per level boost of pricier ores
+
+# Ore market
+MARKET_HALF_LIFE = 600  # seconds for sold volume to be half forgotten
+MARKET_DEPTH = 50  # units sold at which the price falls by ~63% of the way to the floor
+MARKET_PRICE_FLOOR = 0.2  # lowest price as a share of the base price
+
+# Save backups
+BACKUP_DIR = "backups"
+BACKUP_INTERVAL = 120  # seconds between backups of a running game
+BACKUP_CHECKPOINT_EVERY = 20  # versions per full checkpoint, longest restore chain
+BACKUP_RETENTION = 200  # versions kept per profile
+
+# Strategy tournament
+TOURNAMENT_WORLDS = 100  # seeded worlds every strategy plays
+TOURNAMENT_MINUTES = 15  # simulated play time per game
+TOURNAMENT_BATCH = 10  # worlds per worker task
@@ -1,307 +1,203 @@
-import random
 import time
-import json
+_STARTED = time.perf_counter()
+
+import random
 import sys
 import os
 import logging
 
-from modules.items import ITEM_REGISTRY, ORE_POOL, Item
-from modules.actions import MiningAction, InventoryAction, UpgradesAction, ShopAction
-from config import (INITIAL_ITEM_CAPACITY, INITIAL_MINING_TIME, INITIAL_MONEY, 
-                    INITIAL_INVENTORY, ORE_POOL_SIZE, ITEM_DROP_RANGE, SLOWPRINT_DELAY,
-                    LUCKY_EVENT_LUCK_VALUE)
+# Modules the first menu needs, each group is timed for --startup-report.
+# Backups, actions, the earnings model and batch mode are imported on first use
+from modules.items import ORE_POOL, Item
+_IMPORTS = [("import items, catalog", time.perf_counter())]
+from modules.storage import SaveConflictError
+from modules.state import Saves, GameState, GameStateService
+_IMPORTS.append(("import state, storage", time.perf_counter()))
+from modules.animation import KeyListener, Typewriter
+_IMPORTS.append(("import animation", time.perf_counter()))
+from modules.leaderboard import Leaderboard
+from modules.auto_miner import AutoMiner
+from modules.scheduler import LuckyEventEffect, TimedEventEffect
+from modules.mine import Mine
+from modules.market import OreMarket
+from config import (ORE_POOL_SIZE, ITEM_DROP_RANGE, SLOWPRINT_DELAY,
+                    LUCKY_EVENT_LUCK_VALUE, TIMED_EVENT_INTERVAL)
+
+from modules.events import EventManager, HelpStrangerEvent
+_IMPORTS.append(("import other modules", time.perf_counter()))
 
-from modules.events import EventManager, HelpStrangerEvent, LuckyEvent
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler('game.log')]
-)
 logger = logging.getLogger(__name__)
 
-class Saves:
-    """Class for load & save data to json"""
-    def __init__(self, path: str = "save.json"):
-        self.path = path
-        try:
-            with open(self.path, 'r') as f:
-                self.__data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.__data = {
-                "name": "", 
-                "money": INITIAL_MONEY, 
-                "inventory": INITIAL_INVENTORY, 
-                "itemcapacity": INITIAL_ITEM_CAPACITY, 
-                "miningtime": INITIAL_MINING_TIME,
-                "eventdefencecounter": 0,
-                "additional_luck": 0
-            }
-            self.save()
-
-    def __getitem__(self, key):
-        return self.__data.get(key, f"[WARNING] {key} not found")
 
-    def __setitem__(self, key, value):
-        if key not in self.__data:
-            raise KeyError
-        self.__data[key] = value
-        self.save()
+def setup_logging():
+    """Log to game.log, the file is opened on the first record"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler('game.log', delay=True)]
+    )
 
-    def update_all(self, data: dict):
-        """Update all data at once"""
-        for key in data:
-            if key in self.__data:
-                self.__data[key] = data[key]
-        self.save()
 
-    def save(self):
-        with open(self.path, 'w') as save_file:
-            json.dump(self.__data, save_file)
+class StartupReport:
+    """Phase timings of the way to the first menu, printed like -X importtime"""
+    def __init__(self):
+        self._last = _STARTED
+        self.phases: list[tuple[str, float, float]] = []
+        for phase, at in _IMPORTS:
+            self.phases.append((phase, at - self._last, at - _STARTED))
+            self._last = at
 
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, now - _STARTED))
+        self._last = now
 
-class GameState:
-    """Class for store a game state"""
-    
-    def __init__(self, saves: Saves):
-        self.saves = saves if saves else Saves()
-
-        self.inventory: list[Item] = [ITEM_REGISTRY[name]() for name in self.saves["inventory"]]
-        self.item_amounts: list[int] = []
-        self.money: int = self.saves["money"]
-        self.item_capacity: int = self.saves["itemcapacity"]
-        self._mining_time: float = self.saves["miningtime"]
-        self.ore_pool: list[Item] = []
-        self._auto_save_counter = 0
-        self._event_defence_counter = self.saves["eventdefencecounter"]
-        self._additional_luck: float | int = self.saves["additional_luck"]
-
-    @property
-    def mining_time(self) -> float:
-        """Get mining time with minimum bound"""
-        return max(0.1, self._mining_time)
-    
-    @mining_time.setter
-    def mining_time(self, value: float):
-        """Set mining time with validation"""
-        self._mining_time = max(0.1, value)
-
-    @property
-    def event_defence_counter(self) -> int:
-        return self._event_defence_counter
-    
-    @event_defence_counter.setter
-    def event_defence_counter(self, value: int):
-        self._event_defence_counter = max(0, value)
-
-    @property
-    def additional_luck(self) -> float:
-        return self._additional_luck
-    
-    @additional_luck.setter
-    def additional_luck(self, value: float | int):
-        self._additional_luck = max(0, value)
-
-
-class GameStateService:
-    """Service class for game state operations"""
-    def __init__(self, state: GameState):
-        self.state = state
-
-    def save_state(self):
-        """Save current game state to file"""
-        data = {
-            "name": self.state.saves["name"],
-            "money": self.state.money,
-            "inventory": [item.__class__.__name__ for item in self.state.inventory],
-            "itemcapacity": self.state.item_capacity,
-            "miningtime": self.state.mining_time,
-            "eventdefencecounter": self.state.event_defence_counter,
-            "additional_luck": self.state.additional_luck
-        }
-        self.state.saves.update_all(data) 
-        logger.info("Game state saved")
-
-    def clear_inventory(self):
-        """Clear the inventory"""
-        self.state.inventory = []
-        self.save_state()
-        logger.info("Inventory cleared")
-    
-    def add_item_to_inventory(self, item: Item) -> bool:
-        """Add item to inventory if capacity allows"""
-        if len(self.state.inventory) < self.state.item_capacity:
-            self.state.inventory.append(item)
-            self.save_state()
-            logger.info(f"Added {item.name} to inventory")
-            return True
-        logger.warning("Failed to add item: Inventory full")
-        return False
-    
+    def print(self):
+        sys.stderr.write("startup: self [us] | cumulative | phase\n")
+        for phase, took, total in self.phases:
+            sys.stderr.write(f"startup: {took * 1e6:9.0f} | {total * 1e6:10.0f} | {phase}\n")
+        sys.stderr.flush()
 
-    def add_money(self, amount: int) -> int:
-        """Add money with auto-save every 5 transactions"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        self.state.money += amount
-        self.state._auto_save_counter += 1
-        if self.state._auto_save_counter >= 5:
-            self.save_state()
-            self.state._auto_save_counter = 0
-        
-        logger.info(f"Added ${amount}, new balance: ${self.state.money}")
-        return self.state.money
-
-    def deduct_money(self, amount: int) -> int:
-        """Deduct money if sufficient funds exist"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        if self.state.money >= amount:
-            self.state.money -= amount
-            self.save_state()
-            logger.info(f"Deducted ${amount}, new balance: ${self.state.money}")
-            return self.state.money
-        
-        return self.state.money
-    
-    def increase_mining_speed(self, amount: float) -> float:
-        """Increase mining speed (decrease mining time)"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        self.state.mining_time = max(0.1, self.state.mining_time - amount)
-        self.save_state()
-        logger.info(f"Mining time increased, new time: {self.state.mining_time}")
-        return self.state.mining_time
-
-    def decrease_mining_speed(self, amount: float) -> float:
-        """Decrease mining speed (increase mining time)"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        self.state.mining_time += amount
-        self.save_state()
-        logger.info(f"Mining time decreased, new time: {self.state.mining_time}")
-        return self.state.mining_time
-        
-
-    def increase_item_capacity(self, amount: int = 1) -> int:
-        """Increase item capacity"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        self.state.item_capacity += amount
-        self.save_state()
-        logger.info(f"Item capacity increased, new capacity: {self.state.item_capacity}")
-
-        return self.state.item_capacity
-
-    def decrease_item_capacity(self, amount: int = 1) -> int:
-        """Decrease item capacity"""
-        if amount < 0:
-            raise ValueError("Amount must be non-negative")
-
-        self.state.item_capacity = max(1, self.state.item_capacity - amount)
-        self.save_state()
-        logger.info(f"Item capacity decreased, new capacity: {self.state.item_capacity}")
-
-        return self.state.item_capacity
-
-    def increase_luck(self, value: float):
-        self.state.additional_luck += value
-        self.save_state()
-        logger.info(f"Additional luck increased to {value}")
-        return self.state.additional_luck
-
-    def reset_luck(self):
-        self.state.additional_luck = 0
-        self.save_state()
-        logger.info(f"Additional luck zeroed")
-
-        return self.state.additional_luck
-
-    def add_event_defence(self, duration: int = 10) -> int:
-        """Add event defence for a number of minings"""
-        if duration < 0:
-            raise ValueError("Duration must be non-negative")
-        
-        self.state.event_defence_counter += duration
-        self.save_state()
-        
-        logger.info(f"Defent from event effect added for {duration} minings")
-        return self.state.event_defence_counter
-
-    def reduce_event_defence(self) -> int:
-        """Reduce event defence counter by 1"""
-        if self.state.event_defence_counter > 0:
-            self.state.event_defence_counter -= 1
-            self.save_state()
-            logger.info("Event defence counter reduced by 1")
-        
-        return self.state.event_defence_counter
 
 class UI:
     """Class for user interface methods"""
-    
+    def __init__(self):
+        self.keys = KeyListener()
+        self.typewriter = Typewriter(self.keys)
+
     def clear(self):
         os.system('cls' if os.name == 'nt' else 'clear')
 
-    def print_menu(self, state: GameState):
+    def print_menu(self, state: GameState, miner_digs: int | None = None, miner_error: Exception | None = None):
         self.clear()
         print("PyMiner\n\n" + "$" + str(round(state.money)) + 
               "\n\nitem capacity: " + str(state.item_capacity) + 
               "\nmining time: " + str(state.mining_time) + 
               f"\nevent defence: {state.event_defence_counter if state.event_defence_counter > 0 else 'None'}" + 
-              "\n\n[1] go mining\n[2] inventory\n[3] upgrades\n[4] shop\n[5] exit\n")
+              (f"\ndepth: level {state.mine.level + 1}" if state.mine else "") + 
+              (f"\nauto-miner: {miner_digs} digs" if miner_digs is not None else "") + 
+              (f"\nauto-miner: stopped by error ({miner_error})" if miner_error is not None else "") + 
+              "\n\n[1] go mining\n[2] inventory\n[3] upgrades\n[4] shop\n[5] leaderboard\n[6] exit\n")
 
     def print_message(self, message: str):
         print(message)
 
-    def print_inventory(self, items: list, total_value: int):
+    def notify(self, message: str):
+        """Print a message from a background worker without waiting for the screen to redraw"""
+        sys.stdout.write("\n" + message + "\n")
+        sys.stdout.flush()
+
+    def print_inventory(self, items: list, total_value: int, prices: dict[str, float] | None = None):
         self.clear()
         for item in items:
-            print(f"{item.name} - ${item.price}")
+            price = prices[item.name] if prices else item.price
+            print(f"{item.name} - ${price:g}")
         print(f"\nTotal inventory value: ${total_value}\n\n[1] sell all\n[2] back\n")
 
-    def print_upgrades(self, money: int, speed_cost: int, capacity_cost: int):
+    def print_upgrades(self, money: int, speed_cost: int, capacity_cost: int, income: tuple | None = None):
         self.clear()
         print(f"${round(money)}")
+        if income:
+            mean, variance = income
+            print(f"expected income: ${mean:.1f}/min (variance {variance:.1f})")
         print(f"\n[1] Increase mining speed by 0.2 seconds | ${round(speed_cost)}")
         print(f"[2] Increase item capacity by 1 | ${round(capacity_cost)}")
         print("[3] Exit")
 
-    def slowprint(self, text: str, delay: float = SLOWPRINT_DELAY):
-        for c in text + '\n':
-            sys.stdout.write(c)
-            sys.stdout.flush()
-            time.sleep(delay)
-            
+    def print_leaderboard(self, boards: dict, player_ranks: dict):
+        self.clear()
+        for title, entries in boards.items():
+            print(title)
+            if not entries:
+                print("  no players yet")
+            for place, (name, value) in enumerate(entries, 1):
+                print(f"  {place}. {name} - {value}")
+            if player_ranks.get(title):
+                print(f"  your rank: {player_ranks[title]}")
+            print()
+
+    def slowprint(self, text: str, delay: float = SLOWPRINT_DELAY) -> bool:
+        """Typewriter print, enter (any key on Windows) shows the rest at once"""
+        return self.typewriter.type(text + '\n', delay)
+
+    def pause(self, seconds: float) -> bool:
+        """Sleep that the player can skip"""
+        return self.typewriter.pause(seconds)
+
     def input_choice(self, prompt: str = "choice: ") -> str:
-        return input(prompt)
+        return self.keys.input(prompt)
 
     def wait_for_input(self, prompt: str = "Press enter to continue..."):
-        input(prompt)
+        self.keys.input(prompt)
 
 
 class Game:
     """Main game class"""
     
-    def __init__(self, ui: UI, saves: Saves, event_manager: EventManager):
+    def __init__(self, ui: UI, saves: Saves, event_manager: EventManager,
+                 startup_report: StartupReport | None = None):
         self.ui = ui
         self.saves = saves
+        self.leaderboard = Leaderboard()
         self.state = GameState(self.saves)
-        self.state_service = GameStateService(self.state)
+        self.state_service = GameStateService(self.state, self.leaderboard, OreMarket())
         self.event_manager = event_manager
-
-        self.actions = {
-            "1": MiningAction(),
-            "2": InventoryAction(),
-            "3": UpgradesAction(),
-            "4": ShopAction()
-        }
-        self._init_loot()
+        self.startup_report = startup_report
+
+        # BackupWorker, started by the first save
+        self.backups = None
+        if self.saves.persistent:
+            self.saves.on_save = self._backup
+
+        # Actions are imported and built on first use, loot before the first dig
+        self.actions = {}
+        self._loot_ready = False
+        self._init_mine()
+
+        self.auto_miner = AutoMiner(self.state, self.state_service, self._on_auto_dig)
+        self._miner_full = False
+
+    def _action(self, choice: str):
+        """Return the action of a menu choice, None for other choices"""
+        if choice not in self.actions:
+            from modules import actions
+            factories = {
+                "1": actions.MiningAction,
+                "2": actions.InventoryAction,
+                "3": self._upgrades_action,
+                "4": actions.ShopAction,
+                "5": actions.LeaderboardAction
+            }
+            if choice not in factories:
+                return None
+            self._ensure_loot()
+            self.actions[choice] = factories[choice]()
+        return self.actions[choice]
+
+    def _upgrades_action(self):
+        from modules.actions import UpgradesAction
+        from modules.earnings import EarningsModel
+        return UpgradesAction(EarningsModel(self.event_manager, self.state_service.market))
+
+    def _backup(self, text: str):
+        """Hand a written save to the backup worker, started on the first save"""
+        with self.state_service.lock:
+            if self.backups is None:
+                from modules.backup import BackupStore, BackupWorker
+                self.backups = BackupWorker(BackupStore())
+        self.backups.submit(text)
+
+    def _stop_backups(self):
+        if self.backups is not None:
+            self.backups.stop()
+
+    def _dig(self, state, state_service) -> list[Item]:
+        return self._action("1").dig(state, state_service)
+
+    def _ensure_loot(self):
+        if not self._loot_ready:
+            self._loot_ready = True
+            self._init_loot()
 
     def _init_loot(self):
         """Initialize loot"""
@@ -311,58 +207,151 @@ class Game:
             logger.info("Initialized loot pool and item amounts")
             
 
+    def _init_mine(self):
+        """Open the procedural mine of this save, a new save gets a new seed"""
+        seed = self.state.saves["mine_seed"]
+        if not seed:
+            seed = random.getrandbits(31) or 1
+            self.state.saves["mine_seed"] = seed
+        self.state.mine = Mine(seed, self.state.saves["mine_position"])
+        logger.info(f"Opened mine {seed} at {self.state.mine.position}")
+
     def run(self):
         try:
             if self.state.saves["name"]:
                 self.ui.slowprint("Welcome back " + self.state.saves["name"] + "!")
-                time.sleep(2)
+                self.ui.pause(2)
                 logger.info(f"Player {self.state.saves['name']} logged in")
             else:
                 self._welcome()
+            if self.startup_report:
+                self.startup_report.mark("greeting")
+
+            self._init_schedule()
+            if self.state.auto_miner:
+                self._start_auto_miner()
 
             while True:
                 self._menu()
+        except SaveConflictError as e:
+            logger.error(f"Save conflict: {e}")
+            self.auto_miner.stop()
+            self._stop_backups()
+            self.leaderboard.save()
+            print("\nYour save was changed by another game session, progress since the last save is lost.")
+            sys.exit(1)
+
         except KeyboardInterrupt:
             logger.info("Game interrupted by user")
-            self.state_service.save_state()
+            self._shutdown()
             self.ui.clear()
             print("Game saved. Goodbye!")
             sys.exit(0)
 
         except Exception as e:
             logger.error(f"Unexpected error: {e}", exc_info=True)
-            self.state_service.save_state()
+            self._shutdown()
             raise
+
+    def run_batch(self, commands: list) -> "BatchReport":
+        """Run parsed batch commands without UI, saving once at the end"""
+        from modules.batch import BatchRunner
+        runner = BatchRunner(self.state, self.state_service, self._dig, self._action("4").deals,
+                             self._action("3"))
+        with self.state_service.deferred_saves():
+            report = runner.run(commands)
+        self.leaderboard.save()
+        self._stop_backups()
+        logger.info(f"Batch of {report.commands} commands done")
+        return report
+
+    def _shutdown(self):
+        """Persist everything before leaving the game"""
+        self.auto_miner.stop()
+        self.state_service.save_state()
+        self.leaderboard.save()
+        self._stop_backups()
     
     def _welcome(self):
         self.ui.slowprint("Welcome to PyMiner, what's your name? ")
-        name = input("")
-        self.state.saves["name"] = name
-        self.state_service.save_state()
+        name = self.ui.input_choice("")
+        self.state_service.set_name(name)
         self.ui.slowprint("Hello " + name + "!")
-        time.sleep(2)
+        self.ui.pause(2)
+
+    def _init_schedule(self):
+        """Make sure recurring and carried-over effects are scheduled"""
+        scheduler = self.state.scheduler
+        if not scheduler.pending(TimedEventEffect):
+            self.state_service.schedule_after_seconds(TIMED_EVENT_INTERVAL, TimedEventEffect(TIMED_EVENT_INTERVAL))
+
+        # Saves from before the scheduler only have the luck value
+        if self.state.additional_luck >= LUCKY_EVENT_LUCK_VALUE and not scheduler.pending(LuckyEventEffect):
+            self.state_service.schedule_after_digs(1, LuckyEventEffect())
+
+    def _fire_due_effects(self):
+        for effect in self.state_service.pop_due_effects():
+            effect.fire(self.state, self.state_service, self.ui, self.event_manager)
+            logger.info(f"Fired scheduled {effect.__class__.__name__}")
+
+    def _start_auto_miner(self):
+        """Start the hired miner, its mining action and loot are built here, not on its thread"""
+        self._ensure_loot()
+        self.auto_miner.start(self._action("1").dig)
+
+    def _on_auto_dig(self, items: list[Item]):
+        """Tell the player what the auto-miner found"""
+        if items:
+            self._miner_full = False
+            self.ui.notify("[miner] found " + ", ".join(item.name for item in items))
+        elif not self._miner_full:
+            self._miner_full = True
+            self.ui.notify("[miner] inventory is full")
 
     def _menu(self):
-        self.ui.print_menu(self.state)
+        if self.auto_miner.conflict:
+            raise self.auto_miner.conflict
+        self.auto_miner.pause()
+        self._fire_due_effects()
+        self.auto_miner.resume()
+
+        self.ui.print_menu(self.state, self.auto_miner.digs if self.auto_miner.running else None,
+                           self.auto_miner.error)
+        if self.startup_report:
+            self.startup_report.mark("first menu")
+            self.startup_report.print()
+            self.startup_report = None
         choice = self.ui.input_choice()
 
-        if choice in self.actions:
-            self.actions[choice].execute(self.state, self.state_service, self.ui)
+        action = self._action(choice)
+        if action:
+            # The miner waits while the player digs or goes through events
+            if choice == "1":
+                self.auto_miner.pause()
+            action.execute(self.state, self.state_service, self.ui)
             logger.info(f"Executed action {choice}")
 
-            if choice == "1" and self.state.additional_luck >= LUCKY_EVENT_LUCK_VALUE:
-                self.event_manager.trigger_specific_event(LuckyEvent, self.state, self.state_service, self.ui)
+            # A miner stopped by an error stays stopped until the next session
+            if self.state.auto_miner and not self.auto_miner.running and self.auto_miner.error is None:
+                self._start_auto_miner()
+
+            if choice == "1":
+                self._fire_due_effects()
 
             if choice == "1" and self.state.event_defence_counter <= 0:
                 # Check for random event after mining action
                 self.event_manager.trigger_random_event(self.state, self.state_service, self.ui)
 
-        elif choice == "5":
-            self.state_service.save_state()
+            self.auto_miner.resume()
+
+        elif choice == "6":
+            self._shutdown()
             sys.exit()
 
         elif choice == "debug":
+            self.auto_miner.pause()
             self.event_manager.trigger_specific_event(HelpStrangerEvent, self.state, self.state_service, self.ui)
+            self.auto_miner.resume()
         else:
             self.ui.clear()
             print("Invalid choice!")
@@ -370,6 +359,48 @@ class Game:
 
 
 if __name__ == "__main__":
-    game = Game(UI(), Saves(), EventManager(logger))
+    import argparse
+    parser = argparse.ArgumentParser(description="PyMiner")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print timings of startup phases after the first menu")
+    parser.add_argument("--batch", metavar="SCRIPT",
+                        help="run menu commands from a script file ('-' for stdin) and exit, "
+                             "e.g. 'mine x100; sell all; upgrade capacity until broke; buy 1', "
+                             "digs stop while the inventory is full")
+    args = parser.parse_args()
+
+    if args.batch:
+        from modules.batch import parse_script, BatchScriptError
+        setup_logging()
+        try:
+            if args.batch == "-":
+                commands = parse_script(sys.stdin.read())
+            else:
+                with open(args.batch, 'r') as f:
+                    commands = parse_script(f.read())
+        except (OSError, BatchScriptError) as e:
+            sys.exit(f"batch: {e}")
+
+        try:
+            batch_report = Game(UI(), Saves(), EventManager(logger)).run_batch(commands)
+        except BatchScriptError as e:
+            sys.exit(f"batch: {e}")
+        except SaveConflictError as e:
+            sys.exit(f"batch: save was changed by another session ({e})")
+        print(batch_report.summary())
+        sys.exit(0)
+
+    report = StartupReport() if args.startup_report else None
+    if report:
+        report.mark("arguments")
+    setup_logging()
+    if report:
+        report.mark("logging setup")
+    saves = Saves()
+    if report:
+        report.mark("load save")
+    game = Game(UI(), saves, EventManager(logger), report)
+    if report:
+        report.mark("game init")
+    logger.info("Game initialized successfully")
     game.run()
-    logger.info("Game initialized successfully")
\ No newline at end of file
@@ -1,10 +1,16 @@
-from dataclasses import dataclass
 import time
 import random
+import logging
 from abc import ABC, abstractmethod
 from config import (MINING_ANIMATION_FRAMES, UPGRADE_CAPACITY_MULTIPLIER, UPGRADE_SPEED_BASE, 
                     UPGRADE_SPEED_FACTOR, UPGRADE_SPEED_DECREASE, 
-                    UPGRADE_SPEED_MIN_COST, CHOICE_TIMEOUT, LUCKY_EVENT_LUCK_VALUE)
+                    UPGRADE_SPEED_MIN_COST, CHOICE_TIMEOUT, LUCKY_EVENT_LUCK_VALUE,
+                    BLESS_LUCK_DURATION, BLESS_LUCK_WEIGHT_MULTIPLIER)
+from modules.scheduler import LuckyEventEffect
+from modules.modifiers import Modifier, ADDITIVE, MULTIPLICATIVE
+from modules.catalog import CATALOG
+
+logger = logging.getLogger(__name__)
 
 class Action(ABC):
     """Abstract class for all actions"""
@@ -41,27 +47,44 @@ class MiningAction(Action):
         ui.clear()
         ui.print_message("Done!\n")
 
-        items_to_add = random.choice(state.item_amounts)
-        for _ in range(items_to_add):
-                item = random.choice(state.ore_pool)
-                if state_service.add_item_to_inventory(item):
-                    ui.print_message(f"{item.name} - ${item.price}")
-                else:
-                    break
-                
+        market = state_service.market
+        for item in self.dig(state, state_service):
+            ui.print_message(f"{item.name} - ${round(market.quote(item.name), 1):g}")
 
         ui.wait_for_input("\nPress enter to continue...")
-        state_service.reduce_event_defence()
+        state_service.register_dig()
         
         return True
+
+    @staticmethod
+    def dig(state, state_service) -> list:
+        """Mine a random amount of ores into the inventory, returns added items"""
+        added = []
+        with state_service.lock:
+            items_to_add = round(state.modifiers.effective("drop_amount", state.rng.choice(state.item_amounts)))
+            if state.mine:
+                # Don't dig out more than fits, the rest stays in the mine
+                free_slots = max(0, state.item_capacity - len(state.inventory))
+                items = state.mine.take(min(items_to_add, free_slots))
+            else:
+                items = [state.rng.choice(state.ore_pool) for _ in range(items_to_add)]
+
+            for item in items:
+                if not state_service.add_item_to_inventory(item):
+                    break
+                added.append(item)
+
+        logger.info(f"Dug {len(added)} ores")
+        return added
     
 class InventoryAction(Action):
     """Inventory management logic"""
 
     def execute(self, state, state_service, ui) -> bool:
         while True:
-            total_value = sum(item.price for item in state.inventory)
-            ui.print_inventory(state.inventory, total_value)
+            market = state_service.market
+            prices = {item.name: round(market.quote(item.name), 1) for item in state.inventory}
+            ui.print_inventory(state.inventory, market.value(state.inventory), prices)
 
             choice = ui.input_choice()
 
@@ -78,10 +101,8 @@ class InventoryAction(Action):
                 time.sleep(CHOICE_TIMEOUT)
 
     def _sell_inventory(self, state, state_service, ui) -> int:
-        total = sum(item.price for item in state.inventory)
-        state_service.add_money(total)
-        state_service.clear_inventory()
-        
+        total = state_service.sell_inventory()
+
         ui.clear()
         ui.print_message(f"Sold all items for ${total}!")
         
@@ -89,14 +110,19 @@ class InventoryAction(Action):
 
 class UpgradesAction(Action):
     """Upgrades management logic"""
+    def __init__(self, earnings=None) -> None:
+        """
+        :param earnings: EarningsModel used to show expected income, optional
+        """
+        self.earnings = earnings
     
     def execute(self, state, state_service, ui) -> bool:
         while True:
-            capacity_cost = state.item_capacity * UPGRADE_CAPACITY_MULTIPLIER
-            speed_cost = max(UPGRADE_SPEED_MIN_COST, 
-                           UPGRADE_SPEED_BASE - state.mining_time * UPGRADE_SPEED_FACTOR)
+            capacity_cost = self.capacity_cost(state)
+            speed_cost = self.speed_cost(state)
+            income = self.earnings.rate(state) if self.earnings else None
 
-            ui.print_upgrades(state.money, speed_cost, capacity_cost)
+            ui.print_upgrades(state.money, speed_cost, capacity_cost, income)
             choice = ui.input_choice()
 
             if choice == "1":
@@ -115,14 +141,38 @@ class UpgradesAction(Action):
                 ui.print_message("Invalid choice!")
                 time.sleep(CHOICE_TIMEOUT)
 
-    def _upgrade_speed(self, state, state_service, ui) -> bool:
-        cost = max(UPGRADE_SPEED_MIN_COST, 
-                   UPGRADE_SPEED_BASE - state.mining_time * UPGRADE_SPEED_FACTOR)
+    # Upgrades change base stats, so they are priced by base stats too, modifiers don't change the price
+
+    @staticmethod
+    def speed_cost(state) -> float:
+        return max(UPGRADE_SPEED_MIN_COST, UPGRADE_SPEED_BASE - state.base_mining_time * UPGRADE_SPEED_FACTOR)
+
+    @staticmethod
+    def capacity_cost(state) -> int:
+        return state.base_item_capacity * UPGRADE_CAPACITY_MULTIPLIER
 
-        if state.money >= cost:
-            state_service.deduct_money(cost)
-            state_service.increase_mining_speed(UPGRADE_SPEED_DECREASE * state.mining_time)
+    @classmethod
+    def buy_speed(cls, state, state_service) -> bool:
+        """Pay for a mining speed upgrade, False if money is short"""
+        cost = cls.speed_cost(state)
+        if state.money < cost:
+            return False
+        state_service.deduct_money(cost)
+        state_service.increase_mining_speed(UPGRADE_SPEED_DECREASE * state.base_mining_time)
+        return True
+
+    @classmethod
+    def buy_capacity(cls, state, state_service) -> bool:
+        """Pay for an item capacity upgrade, False if money is short"""
+        cost = cls.capacity_cost(state)
+        if state.money < cost:
+            return False
+        state_service.deduct_money(cost)
+        state_service.increase_item_capacity(1)
+        return True
 
+    def _upgrade_speed(self, state, state_service, ui) -> bool:
+        if self.buy_speed(state, state_service):
             ui.clear()
             ui.print_message("Mining speed has been increased!")
             time.sleep(1.5)
@@ -136,12 +186,7 @@ class UpgradesAction(Action):
             return False
 
     def _upgrade_capacity(self, state, state_service, ui) -> bool:
-        cost = state.item_capacity * UPGRADE_CAPACITY_MULTIPLIER
-
-        if state.money >= cost:
-            state_service.deduct_money(cost)
-            state_service.increase_item_capacity(1)
-
+        if self.buy_capacity(state, state_service):
             ui.clear()
             ui.print_message("Item capacity has been increased! Current capacity: " + str(state.item_capacity))
             time.sleep(1.5)
@@ -155,27 +200,42 @@ class UpgradesAction(Action):
             return False
 
 class Deal:
-    def __init__(self) -> None:
-        self.name = "Deal Name"
-        self.cost = 0
-        self.description = "Do something special"
+    """Shop deal abstract class, name, cost and description come from a catalog entry"""
+    def __init__(self, spec: dict) -> None:
+        self.name = spec.get("name", "Deal Name")
+        self.cost = spec.get("cost", 0)
+        self.description = spec.get("description", "Do something special")
 
-    """Shop deal abstract class"""
     @abstractmethod
     def apply_deal(self, state, state_service, ui) -> bool:
         pass
 
+    @abstractmethod
+    def apply_effect(self, state_service) -> None:
+        """Give what the deal promises, without payment and UI"""
+        pass
+
+    def can_buy(self, state) -> bool:
+        return state.money >= self.cost
+
+    def buy(self, state_service) -> bool:
+        """Pay for the deal and apply it, without UI. False if it can't be bought"""
+        if not self.can_buy(state_service.state):
+            return False
+        state_service.deduct_money(self.cost)
+        self.apply_effect(state_service)
+        return True
+
+    def preview(self, state_service):
+        """Return a forked GameStateService with the deal bought, the real state is untouched"""
+        fork = state_service.fork()
+        self.buy(fork)
+        return fork
+
 class GodBlessDeal(Deal):
-    def __init__(self) -> None:
-        self.name = "God bless."
-        self.cost = 100
-        self.description = "Defend yourself from all events for 10 minings"
 
     def apply_deal(self, state, state_service, ui) -> bool:
-        if state.money >= self.cost:
-            state_service.deduct_money(self.cost)
-            state_service.add_event_defence(10)
-
+        if self.buy(state_service):
             ui.clear()
             ui.print_message("You are now protected from all events for the next 10 minings!")
             time.sleep(1.5)
@@ -188,18 +248,13 @@ class GodBlessDeal(Deal):
 
             return False
 
+    def apply_effect(self, state_service) -> None:
+        state_service.add_event_defence(10)
+
 class BlessForLuckDeal(Deal):
 
-    def __init__(self) -> None:
-        self.name = "Bless for luck"
-        self.cost = 75
-        self.description = "Only lucky events on your path"
-        
     def apply_deal(self, state, state_service, ui) -> bool:
-        if state.money >= self.cost:
-            state_service.deduct_money(self.cost)
-            state_service.increase_luck(LUCKY_EVENT_LUCK_VALUE)
-
+        if self.buy(state_service):
             ui.clear()
             ui.print_message("You are now blessed for luck! Only lucky events on your path!")
             time.sleep(1.5)
@@ -212,6 +267,48 @@ class BlessForLuckDeal(Deal):
 
             return False
 
+    def apply_effect(self, state_service) -> None:
+        state_service.add_modifier(Modifier("luck", ADDITIVE, LUCKY_EVENT_LUCK_VALUE, "BlessForLuckDeal"))
+        state_service.add_modifier(Modifier("event_weight:LuckyEvent", MULTIPLICATIVE,
+                                            BLESS_LUCK_WEIGHT_MULTIPLIER, "BlessForLuckDeal"),
+                                   digs=BLESS_LUCK_DURATION)
+        state_service.schedule_after_digs(1, LuckyEventEffect())
+
+class HireMinerDeal(Deal):
+
+    def apply_deal(self, state, state_service, ui) -> bool:
+        if state.auto_miner:
+            ui.clear()
+            ui.print_message("You already have a miner!")
+            time.sleep(1.5)
+
+            return False
+        elif self.buy(state_service):
+            ui.clear()
+            ui.print_message("A miner joined you! He will dig while you are in menus.")
+            time.sleep(1.5)
+
+            return True
+        else:
+            ui.clear()
+            ui.print_message("Not enough money!")
+            time.sleep(1.5)
+
+            return False
+
+    def can_buy(self, state) -> bool:
+        return not state.auto_miner and super().can_buy(state)
+
+    def apply_effect(self, state_service) -> None:
+        state_service.hire_miner()
+
+
+DEAL_TYPES = {
+    "GodBlessDeal": GodBlessDeal,
+    "BlessForLuckDeal": BlessForLuckDeal,
+    "HireMinerDeal": HireMinerDeal,
+}
+
 
 class ShopAction(Action):
     """Shop management logic"""
@@ -228,10 +325,14 @@ class ShopAction(Action):
             "2": "Leave shop"
         }
 
-        self.deals: dict[str, Deal] = {
-            "1": GodBlessDeal(),
-            "2": BlessForLuckDeal()
-        }
+        self._deals: dict[str, Deal] | None = None
+
+    @property
+    def deals(self) -> dict[str, Deal]:
+        """Deals are built when the player first looks at them"""
+        if self._deals is None:
+            self._deals = {spec["key"]: DEAL_TYPES[spec["type"]](spec) for spec in CATALOG.deals}
+        return self._deals
         
     def execute(self, state, state_service, ui) -> bool:
         while True:
@@ -249,6 +350,7 @@ class ShopAction(Action):
                         ui.clear()
                         for key, deal in self.deals.items():
                             ui.print_message(f"[{key}] {deal.name}: {deal.description} (Cost: ${deal.cost})")
+                            ui.print_message(self._preview_message(deal, state, state_service))
                         
                         choice = ui.input_choice("That's a good deals! I'll take it.\nChoose a deal number or press enter to go back: ")
                         if choice in self.deals.keys():
@@ -275,6 +377,42 @@ class ShopAction(Action):
                 ui.print_message("Invalid choice!")
                 time.sleep(CHOICE_TIMEOUT)
     
+    def _preview_message(self, deal: Deal, state, state_service) -> str:
+        """Describe the state after buying a deal"""
+        if state.money < deal.cost:
+            return "    you can't afford it yet"
+
+        after = deal.preview(state_service).state
+        return (f"    after: ${round(after.money)}, "
+                f"event defence {after.event_defence_counter}, luck {after.additional_luck}")
+
     def _buy_deal(self, deal: Deal, state, state_service, ui) -> bool:
         return deal.apply_deal(state, state_service, ui)
 
+
+
+class LeaderboardAction(Action):
+    """Leaderboard view logic"""
+    def __init__(self) -> None:
+        self.titles = {
+            "money": "Richest miners",
+            "lifetime_earnings": "Lifetime earnings",
+            "rarest_ore": "Rarest ore found",
+            "mining_time": "Fastest miners"
+        }
+
+    def execute(self, state, state_service, ui) -> bool:
+        leaderboard = state_service.leaderboard
+        if leaderboard is None:
+            ui.clear()
+            ui.print_message("Leaderboard is not available")
+            time.sleep(CHOICE_TIMEOUT)
+            return True
+
+        name = state.saves["name"]
+        boards = {title: leaderboard.top(metric, 10) for metric, title in self.titles.items()}
+        ranks = {title: leaderboard.rank(metric, name) for metric, title in self.titles.items()}
+
+        ui.print_leaderboard(boards, ranks)
+        ui.wait_for_input("\nPress enter to continue...")
+        return True
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+
+from config import ANIMATION_FRAME_TIME
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import select
+
+
+class KeyListener:
+    """Watches the keyboard while text is animating
+
+    On POSIX the terminal stays in line mode, so a finished line (enter) skips
+    the animation. On Windows any key does. A line typed during an animation is
+    kept and returned by the next input() instead of asking again.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.pending: str | None = None
+        self._typed = ""  # Windows only, characters typed without enter
+
+    @property
+    def interactive(self) -> bool:
+        try:
+            return self.stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds, returns True as soon as a key is pressed"""
+        if self.pending is not None:
+            return True
+        if not self.interactive:
+            time.sleep(timeout)
+            return False
+        if os.name == 'nt':
+            return self._wait_console(timeout)
+
+        ready, _, _ = select.select([self.stream], [], [], timeout)
+        if not ready:
+            return False
+        line = self.stream.readline().rstrip("\n")
+        if line:
+            self.pending = line
+        return True
+
+    def _wait_console(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.01, remaining))
+
+        while msvcrt.kbhit():
+            char = msvcrt.getwch()
+            if char in "\r\n":
+                if self._typed:
+                    self.pending, self._typed = self._typed, ""
+                break
+            if char == "\b":
+                self._typed = self._typed[:-1]
+            else:
+                self._typed += char
+        return True
+
+    def input(self, prompt: str = "") -> str:
+        """input() that first returns a line typed during an animation"""
+        if self.pending is not None:
+            line, self.pending = self.pending, None
+            print(prompt + line)
+            return line
+        if self._typed:
+            typed, self._typed = self._typed, ""
+            return typed + input(prompt + typed)
+        return input(prompt)
+
+
+class Typewriter:
+    """Prints text a few characters at a time
+
+    Characters due within one frame (ANIMATION_FRAME_TIME) go out in a single
+    write and flush. Waiting between frames listens for keys, and a key press
+    prints the rest of the text at once.
+    """
+    def __init__(self, keys: KeyListener, output=None, frame: float = ANIMATION_FRAME_TIME):
+        self.keys = keys
+        self.output = output or sys.stdout
+        self.frame = frame
+
+    def type(self, text: str, delay: float) -> bool:
+        """Animate text with delay seconds per character, returns True if it was skipped"""
+        step = max(1, round(self.frame / delay)) if delay > 0 else len(text)
+        for start in range(0, len(text), step):
+            self.output.write(text[start:start + step])
+            self.output.flush()
+            if self.keys.wait(len(text[start:start + step]) * delay):
+                self.output.write(text[start + step:])
+                self.output.flush()
+                return True
+        return False
+
+    def pause(self, seconds: float) -> bool:
+        """Wait unless a key is pressed, returns True if it was skipped"""
+        return self.keys.wait(seconds)
@@ -0,0 +1,97 @@
+import threading
+import logging
+
+from config import AUTO_MINER_TIME_FACTOR
+from modules.storage import SaveConflictError
+
+logger = logging.getLogger(__name__)
+
+
+class AutoMiner:
+    """Background worker that keeps digging while the player is busy in menus
+
+    Every dig goes through GameStateService, which serializes it with the
+    player's own actions. The worker can be paused (e.g. during manual mining
+    and events) and resumed without restarting the thread.
+    """
+    def __init__(self, state, state_service, on_dig=None):
+        """
+        :param state: GameState
+        :param state_service: GameStateService
+        :param on_dig: callable(list[Item]) called after every dig, optional
+        """
+        self.state = state
+        self.state_service = state_service
+        self.dig = None
+        self.on_dig = on_dig
+        self.digs = 0
+        # Set when a save made by the miner lost to another process, the game raises it
+        self.conflict: SaveConflictError | None = None
+        # Set when any other error stopped the miner, the menu shows it and the miner stays stopped
+        self.error: Exception | None = None
+
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resumed.is_set()
+
+    def interval(self) -> float:
+        """Seconds between digs, shrinks with mining speed upgrades"""
+        return self.state.mining_time * AUTO_MINER_TIME_FACTOR
+
+    def start(self, dig):
+        """
+        :param dig: callable(state, state_service) -> list[Item] performing one dig, built by the caller
+            so the worker never creates shared objects
+        """
+        if self.running:
+            return
+        self.dig = dig
+        self.error = None
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="auto-miner", daemon=True)
+        self._thread.start()
+        logger.info("Auto-miner started")
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stopped.set()
+        self._resumed.set()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Auto-miner stopped after {self.digs} digs")
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval()):
+            self._resumed.wait()
+            if self._stopped.is_set():
+                break
+
+            try:
+                items = self.dig(self.state, self.state_service)
+                self.digs += 1
+                if self.on_dig:
+                    self.on_dig(items)
+            except SaveConflictError as e:
+                logger.error(f"Auto-miner stopped by save conflict: {e}")
+                self.conflict = e
+                break
+            except Exception as e:
+                logger.exception(f"Auto-miner stopped by error: {e}")
+                self.error = e
+                break
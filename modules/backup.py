@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+from config import BACKUP_DIR, BACKUP_INTERVAL, BACKUP_CHECKPOINT_EVERY, BACKUP_RETENTION
+from modules.storage import FileLock, atomic_write, read_json
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _without_version(data: dict) -> dict:
+    return {key: value for key, value in data.items() if key != "version"}
+
+
+def _diff(old: dict, new: dict) -> dict:
+    """Top-level key delta that turns old into new"""
+    return {
+        "set": {key: value for key, value in new.items() if key not in old or old[key] != value},
+        "del": [key for key in old if key not in new],
+    }
+
+
+class BackupStore:
+    """Versioned save backups, one directory per profile
+
+    Every version is a zlib-compressed object named by the SHA-256 of its
+    content: either a full save or a delta against the previous version.
+    A full checkpoint is written every BACKUP_CHECKPOINT_EVERY versions, so
+    restoring reads at most that many objects. Retention drops whole
+    segments (a checkpoint and its deltas) once a profile has more than
+    BACKUP_RETENTION versions.
+    """
+    def __init__(self, root: str = BACKUP_DIR):
+        self.root = root
+        # Last backed up data per profile, to diff against without a restore
+        self._last: dict[str, tuple[str, dict]] = {}
+
+    def _profile_dir(self, profile: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", profile)[:32] or "_"
+        digest = hashlib.sha256(profile.encode()).hexdigest()[:8]
+        return os.path.join(self.root, f"{safe}-{digest}")
+
+    def _index_path(self, profile: str) -> str:
+        return os.path.join(self._profile_dir(profile), "index.json")
+
+    def _object_path(self, profile: str, object_id: str) -> str:
+        return os.path.join(self._profile_dir(profile), "objects", object_id + ".z")
+
+    def versions(self, profile: str) -> list[dict]:
+        """Backed up versions of a profile, oldest first: {id, time, version, full}"""
+        return read_json(self._index_path(profile), {}).get("versions", [])
+
+    def profiles(self) -> list[str]:
+        """Profiles with backups, most recently backed up first"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for entry in os.listdir(self.root):
+            index = read_json(os.path.join(self.root, entry, "index.json"))
+            if index and index.get("versions"):
+                found.append((index["versions"][-1]["time"], index["profile"]))
+        return [profile for _, profile in sorted(found, reverse=True)]
+
+    def _write_object(self, profile: str, payload: dict) -> str:
+        content = _canonical(payload)
+        object_id = hashlib.sha256(content).hexdigest()
+        path = self._object_path(profile, object_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, zlib.compress(content, 9))
+        return object_id
+
+    def _read_object(self, profile: str, object_id: str) -> dict:
+        with open(self._object_path(profile, object_id), 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def backup(self, data: dict, now: float | None = None) -> str | None:
+        """Store a new version of the profile in data, returns its id or None if nothing was stored"""
+        profile = data.get("name", "")
+        if not profile:
+            return None  # not registered yet, nothing worth keeping
+        now = time.time() if now is None else now
+        os.makedirs(self._profile_dir(profile), exist_ok=True)
+
+        with FileLock(self._index_path(profile)):
+            index = read_json(self._index_path(profile), {"profile": profile, "versions": []})
+            versions = index["versions"]
+
+            last = self._last.get(profile)
+            if versions and (last is None or last[0] != versions[-1]["id"]):
+                last = (versions[-1]["id"], self.restore(profile))
+            # Every save bumps "version", a backup is only worth it if something else changed
+            if last is not None and _without_version(last[1]) == _without_version(data):
+                return None
+
+            since_full = 0
+            for entry in reversed(versions):
+                if entry["full"]:
+                    break
+                since_full += 1
+
+            full = not versions or since_full + 1 >= BACKUP_CHECKPOINT_EVERY
+            if full:
+                object_id = self._write_object(profile, {"full": data})
+            else:
+                object_id = self._write_object(profile, {"base": versions[-1]["id"], **_diff(last[1], data)})
+
+            versions.append({"id": object_id, "time": now, "version": data.get("version", 0), "full": full})
+            removed = self._prune(versions)
+            atomic_write(self._index_path(profile), json.dumps(index))
+
+        for object_id in removed:
+            try:
+                os.remove(self._object_path(profile, object_id))
+            except FileNotFoundError:
+                pass
+
+        self._last[profile] = (object_id, json.loads(json.dumps(data)))
+        return object_id
+
+    @staticmethod
+    def _prune(versions: list[dict]) -> set[str]:
+        """Drop oldest segments over retention, returns ids of objects no version uses anymore"""
+        dropped = []
+        while len(versions) > BACKUP_RETENTION:
+            # The next checkpoint starts the segment that is kept
+            end = next((i for i in range(1, len(versions)) if versions[i]["full"]), None)
+            if end is None or len(versions) - end < BACKUP_RETENTION:
+                break
+            dropped.extend(versions[:end])
+            del versions[:end]
+        kept = {entry["id"] for entry in versions}
+        return {entry["id"] for entry in dropped} - kept
+
+    def restore(self, profile: str, position: int = -1) -> dict | None:
+        """Data of a backed up version (index into versions(), latest by default)"""
+        versions = self.versions(profile)
+        if not versions:
+            return None
+
+        position = position % len(versions)
+        start = position
+        while not versions[start]["full"]:
+            start -= 1
+
+        data = self._read_object(profile, versions[start]["id"])["full"]
+        for entry in versions[start + 1:position + 1]:
+            delta = self._read_object(profile, entry["id"])
+            for key in delta["del"]:
+                data.pop(key, None)
+            data.update(delta["set"])
+        return data
+
+    def restore_latest(self) -> dict | None:
+        """Latest version of the most recently backed up profile"""
+        profiles = self.profiles()
+        return self.restore(profiles[0]) if profiles else None
+
+
+class BackupWorker:
+    """Takes backups on a background thread, at most one per BACKUP_INTERVAL seconds
+
+    Saves hand over their serialized JSON and return right away. Only the
+    newest snapshot is kept, older ones waiting for the interval are skipped.
+    Once stopped, every snapshot is backed up right away on the caller's thread.
+    """
+    def __init__(self, store: BackupStore, interval: float = BACKUP_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self._latest: str | None = None
+        self._last_backup = float("-inf")
+        self._lock = threading.Lock()
+        # Serializes backups of the thread and of callers after stop()
+        self._backup_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, snapshot: str):
+        """Queue the serialized save for the next backup"""
+        with self._lock:
+            stopped = self._stopped.is_set()
+            if not stopped:
+                self._latest = snapshot
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="backup", daemon=True)
+                    self._thread.start()
+        if stopped:
+            self._backup(snapshot)
+        else:
+            self._wake.set()
+
+    def _take(self) -> str | None:
+        with self._lock:
+            snapshot, self._latest = self._latest, None
+        return snapshot
+
+    def _backup(self, snapshot: str):
+        try:
+            with self._backup_lock:
+                self.store.backup(json.loads(snapshot))
+            self._last_backup = time.monotonic()
+        except (OSError, ValueError) as e:
+            logger.error(f"Backup failed: {e}")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            remaining = self._last_backup + self.interval - time.monotonic()
+            if remaining > 0 and self._stopped.wait(remaining):
+                break
+            snapshot = self._take()
+            if snapshot is not None:
+                self._backup(snapshot)
+
+    def stop(self):
+        """Back up the newest snapshot and stop the thread"""
+        with self._lock:
+            self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        snapshot = self._take()
+        if snapshot is not None:
+            self._backup(snapshot)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m modules.backup", description="Save backups")
+    parser.add_argument("--dir", default=BACKUP_DIR, help="backup directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("profiles", help="list profiles with backups")
+    list_parser = commands.add_parser("list", help="list versions of a profile")
+    list_parser.add_argument("profile")
+    restore_parser = commands.add_parser("restore", help="write a backed up version to a save file")
+    restore_parser.add_argument("profile")
+    restore_parser.add_argument("position", type=int, nargs="?", default=-1,
+                                help="version number from 'list', latest by default")
+    restore_parser.add_argument("--save", default="save.json", help="save file to write")
+    args = parser.parse_args(argv)
+
+    store = BackupStore(args.dir)
+    if args.command == "profiles":
+        for profile in store.profiles():
+            print(profile)
+    elif args.command == "list":
+        for position, entry in enumerate(store.versions(args.profile)):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+            kind = "full" if entry["full"] else "delta"
+            print(f"{position:4}  {stamp}  save version {entry['version']:<6} {kind:5}  {entry['id'][:12]}")
+    else:
+        data = store.restore(args.profile, args.position)
+        if data is None:
+            raise SystemExit(f"no backups of {args.profile!r}")
+        # A newer version makes running games of this save stop instead of overwriting it
+        with FileLock(args.save):
+            current = read_json(args.save, {})
+            data["version"] = max(data.get("version", 0), current.get("version", 0)) + 1
+            atomic_write(args.save, json.dumps(data))
+        print(f"restored {args.profile!r} to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import re
+import time
+
+from modules.scheduler import ExpireModifierEffect
+
+# Repeat count meaning "until the money runs out"
+UNTIL_BROKE = None
+
+_COUNT = r"(?:\s+x(?P<count>\d+))?"
+_REPEAT = r"(?:\s+x(?P<count>\d+)|\s+(?P<broke>until broke))?"
+COMMAND_PATTERNS = {
+    "mine": re.compile(r"mine" + _COUNT, re.IGNORECASE),
+    "sell": re.compile(r"sell(?:\s+all)?", re.IGNORECASE),
+    "upgrade": re.compile(r"upgrade\s+(?P<target>capacity|speed)" + _REPEAT, re.IGNORECASE),
+    "buy": re.compile(r"buy\s+(?P<target>\S+)" + _REPEAT, re.IGNORECASE),
+    "name": re.compile(r"name\s+(?P<target>\S.*)", re.IGNORECASE),
+}
+
+
+class BatchScriptError(ValueError):
+    """Command script that can't be parsed, nothing has been run"""
+
+
+class Command:
+    """One scripted menu action, repeated count times (UNTIL_BROKE for as long as money allows)"""
+    __slots__ = ("verb", "target", "count", "source")
+
+    def __init__(self, verb: str, target: str | None = None, count: int | None = 1, source: str = ""):
+        self.verb = verb
+        self.target = target
+        self.count = count
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"Command({self.source!r})"
+
+
+def parse_script(script: str) -> list[Command]:
+    """Parse commands separated by newlines or ';', '#' starts a comment"""
+    commands = []
+    for number, line in enumerate(script.splitlines(), 1):
+        for text in line.split("#", 1)[0].split(";"):
+            text = " ".join(text.split())
+            if not text:
+                continue
+
+            verb = text.split(" ", 1)[0].lower()
+            pattern = COMMAND_PATTERNS.get(verb)
+            match = pattern.fullmatch(text) if pattern else None
+            if match is None:
+                raise BatchScriptError(f"line {number}: unknown command {text!r}")
+
+            groups = match.groupdict()
+            if groups.get("broke"):
+                count = UNTIL_BROKE
+            else:
+                count = int(groups.get("count") or 1)
+            target = groups.get("target")
+            if target and verb != "name":
+                target = target.lower()
+            commands.append(Command(verb, target, count, text))
+    return commands
+
+
+class BatchReport:
+    """What a batch run did"""
+    def __init__(self, state):
+        self.commands = 0
+        self.digs = 0
+        self.full_digs = 0
+        self.items = 0
+        self.sold = 0
+        self.upgrades = {"capacity": 0, "speed": 0}
+        self.deals = 0
+        self.start_money = state.money
+        self.elapsed = 0.0
+        self.state = state
+
+    def summary(self) -> str:
+        state = self.state
+        lines = [
+            f"commands: {self.commands} in {self.elapsed * 1000:.1f} ms",
+            f"digs: {self.digs} ({self.items} ores)",
+            f"sold for: ${self.sold}",
+            f"upgrades: capacity {self.upgrades['capacity']}, speed {self.upgrades['speed']}",
+            f"deals bought: {self.deals}",
+            f"money: ${round(self.start_money)} -> ${round(state.money)}",
+            f"item capacity: {state.item_capacity}, mining time: {round(state.mining_time, 2)}, "
+            f"inventory: {len(state.inventory)}",
+        ]
+        if self.full_digs:
+            lines.insert(2, f"skipped: {self.full_digs} digs with a full inventory "
+                            f"(capacity {state.item_capacity}), 'sell' between digs to keep mining")
+        return "\n".join(lines)
+
+
+class BatchRunner:
+    """Runs parsed commands straight against GameStateService
+
+    No UI, no animations and no random events. Effects that need the player
+    (scheduled events) are put back and fire in the next interactive session,
+    modifiers still expire by digs. Wall-clock effects are never taken off
+    their schedule. Digs stop when the inventory is full, they are counted
+    as skipped until a `sell` makes room.
+    """
+    def __init__(self, state, state_service, dig, deals: dict, upgrades):
+        """
+        :param state: GameState
+        :param state_service: GameStateService
+        :param dig: callable(state, state_service) -> list[Item], performs one dig
+        :param deals: shop deals by key
+        :param upgrades: UpgradesAction
+        """
+        self.state = state
+        self.state_service = state_service
+        self.dig = dig
+        self.deals = deals
+        self.upgrades = upgrades
+        self._deferred_effects = []
+
+    def run(self, commands: list[Command]) -> BatchReport:
+        for command in commands:
+            if command.verb == "buy" and command.target not in self.deals:
+                raise BatchScriptError(f"{command.source!r}: no deal {command.target}")
+
+        report = BatchReport(self.state)
+        started = time.perf_counter()
+        for command in commands:
+            getattr(self, "_" + command.verb)(command, report)
+            report.commands += 1
+
+        # Only dig-timed effects are taken, they go back due at the current dig
+        for effect in self._deferred_effects:
+            self.state_service.schedule_after_digs(0, effect)
+        self._deferred_effects.clear()
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _repeat(command: Command, step) -> int:
+        """Call step until it fails or count is reached, returns number of successes"""
+        done = 0
+        while command.count is UNTIL_BROKE or done < command.count:
+            if not step():
+                break
+            done += 1
+        return done
+
+    def _mine(self, command: Command, report: BatchReport):
+        for _ in range(command.count):
+            if len(self.state.inventory) >= self.state.item_capacity:
+                report.full_digs += 1
+                continue
+            report.items += len(self.dig(self.state, self.state_service))
+            self.state_service.register_dig()
+            report.digs += 1
+            self._expire_effects()
+
+    def _expire_effects(self):
+        for effect in self.state_service.pop_due_effects(by_time=False):
+            if isinstance(effect, ExpireModifierEffect):
+                effect.fire(self.state, self.state_service, None, None)
+            else:
+                self._deferred_effects.append(effect)
+
+    def _sell(self, command: Command, report: BatchReport):
+        report.sold += self.state_service.sell_inventory()
+
+    def _upgrade(self, command: Command, report: BatchReport):
+        buy = self.upgrades.buy_capacity if command.target == "capacity" else self.upgrades.buy_speed
+        report.upgrades[command.target] += self._repeat(command, lambda: buy(self.state, self.state_service))
+
+    def _buy(self, command: Command, report: BatchReport):
+        deal = self.deals[command.target]
+        report.deals += self._repeat(command, lambda: deal.buy(self.state_service))
+
+    def _name(self, command: Command, report: BatchReport):
+        self.state_service.set_name(command.target)
@@ -0,0 +1,84 @@
+import json
+import os
+import pickle
+from itertools import accumulate
+
+from modules.storage import atomic_write
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content")
+CATALOG_PATH = os.path.join(CONTENT_DIR, "catalog.json")
+# Bump when the compiled layout changes, old caches are then recompiled
+CATALOG_FORMAT = 1
+
+
+class Catalog:
+    """Game content compiled from content/catalog.json
+
+    Ores, events and deals are kept in file order with lookup indexes and
+    cumulative weight tables, so sampling is a bisect and lookups are one dict
+    access however many entries the content file has.
+
+    Content file:
+    - ores: [{name, price, chance}]
+    - events: [{name, weight, description, conseq, behaviour?, choices?}], behaviour
+      is the event class to reuse, by default the class with the event's name
+    - deals: [{key, type, name, cost, description}], type is the Deal class
+    """
+    def __init__(self, content: dict):
+        ores = content.get("ores", [])
+        self.ore_names: list[str] = [ore["name"] for ore in ores]
+        self.ores: dict[str, tuple[float, float]] = {ore["name"]: (ore["price"], ore["chance"]) for ore in ores}
+        self.ore_index: dict[str, int] = {name: index for index, name in enumerate(self.ore_names)}
+        self.ore_chances: list[float] = [ore["chance"] for ore in ores]
+        self.ore_cum_chances: list[float] = list(accumulate(self.ore_chances))
+        # Rank of each ore by price, the cheapest is 0
+        by_price = sorted(range(len(ores)), key=lambda index: ores[index]["price"])
+        self.ore_price_ranks: list[int] = [0] * len(ores)
+        for rank, index in enumerate(by_price):
+            self.ore_price_ranks[index] = rank
+
+        events = content.get("events", [])
+        self.events: dict[str, dict] = {event["name"]: event for event in events}
+        self.event_names: list[str] = [event["name"] for event in events]
+        self.event_weights: list[float] = [event["weight"] for event in events]
+        self.event_cum_weights: list[float] = list(accumulate(self.event_weights))
+
+        self.deals: list[dict] = content.get("deals", [])
+
+    def price(self, ore: str) -> float:
+        return self.ores[ore][0]
+
+    def chance(self, ore: str) -> float:
+        return self.ores[ore][1]
+
+    def event(self, name: str) -> dict:
+        return self.events[name]
+
+
+def _source_stamp(path: str) -> tuple[int, int, int]:
+    stat = os.stat(path)
+    return CATALOG_FORMAT, stat.st_mtime_ns, stat.st_size
+
+
+def load_catalog(path: str = CATALOG_PATH) -> Catalog:
+    """Load the compiled catalog, recompiling it when the content file changed"""
+    cache_path = os.path.splitext(path)[0] + ".pickle"
+    stamp = _source_stamp(path)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_stamp, catalog = pickle.load(f)
+        if cached_stamp == stamp:
+            return catalog
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+
+    with open(path, 'r') as f:
+        catalog = Catalog(json.load(f))
+    try:
+        atomic_write(cache_path, pickle.dumps((stamp, catalog), pickle.HIGHEST_PROTOCOL))
+    except OSError:
+        pass  # read-only install, compile again next time
+    return catalog
+
+
+CATALOG = load_catalog()
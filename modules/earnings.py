@@ -0,0 +1,328 @@
+import math
+from collections import Counter, OrderedDict
+from itertools import repeat
+from operator import add, mul
+
+from config import BASIC_EVENT_CHANCE, LUCKY_EVENT_LUCK_VALUE, EARNINGS_BUCKETS, EARNINGS_RUNS
+from modules.events import LuckyEvent
+
+
+def _convolve(a: list[float], b: list[float]) -> list[float]:
+    """Probabilities of the sum of two independent grid distributions"""
+    if len(a) < len(b):
+        a, b = b, a
+    out = [0.0] * (len(a) + len(b) - 1)
+    width = len(a)
+    for i, p in enumerate(b):
+        if p:
+            out[i:i + width] = map(add, out[i:i + width], map(mul, a, repeat(p)))
+    return out
+
+
+class Distribution:
+    """Probability distribution over money amounts on a grid offset + i * step
+
+    While the support fits in EARNINGS_BUCKETS points the step is 1 and the
+    distribution is exact. Wider ones are coarsened by splitting the mass of
+    every point between its two neighbouring grid points, so convolutions stay
+    at EARNINGS_BUCKETS ** 2 operations however long the sum. Mean and variance
+    are tracked separately and stay exact.
+    """
+    __slots__ = ("offset", "step", "probs", "mean", "variance")
+
+    def __init__(self, offset: int, step: int, probs: list[float], mean: float, variance: float):
+        self.offset = offset
+        self.step = step
+        self.probs = probs
+        self.mean = mean
+        self.variance = variance
+
+    @staticmethod
+    def _grid(low: int, high: int, step: int = 1) -> tuple[int, int]:
+        """Step (at least step) and size of a grid from low covering high"""
+        step = max(step, math.ceil((high - low) / (EARNINGS_BUCKETS - 1)) if high > low else 1)
+        return step, (high - low) // step + 2
+
+    @staticmethod
+    def _spread(points, offset: int, step: int, size: int) -> list[float]:
+        """Put (value, probability) points on a grid, splitting each between its neighbours"""
+        probs = [0.0] * size
+        for value, p in points:
+            position, rest = divmod(value - offset, step)
+            if rest:
+                share = rest / step
+                probs[position] += p * (1 - share)
+                probs[position + 1] += p * share
+            else:
+                probs[position] += p
+        while len(probs) > 1 and not probs[-1]:
+            probs.pop()
+        return probs
+
+    def points(self):
+        """(value, probability) pairs of the grid"""
+        return ((self.offset + i * self.step, p) for i, p in enumerate(self.probs) if p)
+
+    @property
+    def pmf(self) -> dict[int, float]:
+        return dict(self.points())
+
+    @classmethod
+    def from_points(cls, points: list[tuple[int, float]], step: int = 1) -> "Distribution":
+        """Distribution of (value, probability) pairs, values may repeat"""
+        mean = sum(value * p for value, p in points)
+        variance = sum((value - mean) ** 2 * p for value, p in points)
+        low = min(value for value, _ in points)
+        high = max(value for value, _ in points)
+        step, size = cls._grid(low, high, step)
+        return cls(low, step, cls._spread(points, low, step, size), mean, variance)
+
+    @classmethod
+    def from_pmf(cls, pmf: dict[int, float]) -> "Distribution":
+        return cls.from_points(list(pmf.items()))
+
+    @classmethod
+    def constant(cls, value: int = 0) -> "Distribution":
+        return cls(value, 1, [1.0], value, 0.0)
+
+    @classmethod
+    def uniform(cls, values: list[int]) -> "Distribution":
+        return cls.from_points([(value, 1 / len(values)) for value in values])
+
+    @classmethod
+    def mixture(cls, parts: list[tuple[float, "Distribution"]]) -> "Distribution":
+        """Pick one of the distributions with the given probabilities"""
+        points = [(value, chance * p) for chance, distribution in parts for value, p in distribution.points()]
+        mixed = cls.from_points(points, max(distribution.step for _, distribution in parts))
+        # Exact moments by the law of total variance
+        mixed.mean = sum(chance * distribution.mean for chance, distribution in parts)
+        mixed.variance = sum(chance * (distribution.variance + distribution.mean ** 2)
+                             for chance, distribution in parts) - mixed.mean ** 2
+        return mixed
+
+    def _with_step(self, step: int) -> list[float]:
+        if step == self.step:
+            return self.probs
+        high = self.offset + (len(self.probs) - 1) * self.step
+        return self._spread(self.points(), self.offset, step, (high - self.offset) // step + 2)
+
+    def __add__(self, other: "Distribution") -> "Distribution":
+        """Distribution of the sum of two independent amounts (convolution)"""
+        step = max(self.step, other.step)
+        offset = self.offset + other.offset
+        probs = _convolve(self._with_step(step), other._with_step(step))
+        total = Distribution(offset, step, probs, self.mean + other.mean, self.variance + other.variance)
+
+        coarse_step, size = self._grid(offset, offset + (len(probs) - 1) * step, step)
+        if coarse_step != step:
+            total.probs = self._spread(list(total.points()), offset, coarse_step, size)
+            total.step = coarse_step
+        return total
+
+    def at_least(self, low: int) -> "Distribution":
+        """Distribution of max(amount, low), mean and variance are taken from the grid"""
+        if self.offset >= low:
+            return self
+        return Distribution.from_points([(max(value, low), p) for value, p in self.points()], self.step)
+
+    def power(self, n: int) -> "Distribution":
+        """Distribution of the sum of n independent copies"""
+        result = Distribution.constant(0)
+        base = self
+        while n > 0:
+            if n & 1:
+                result = result + base
+            n >>= 1
+            if n:
+                base = base + base
+        return result
+
+
+class _Balance:
+    """Stand-in state for event income at another balance, income_distribution only reads money"""
+    __slots__ = ("money",)
+
+    def __init__(self, money: int):
+        self.money = money
+
+
+class EarningsModel:
+    """Income distribution per dig and per minute for a game state
+
+    Income of a dig is the value of mined ores (truncated by free capacity) plus
+    the money change of events that may follow it. Ores are priced on the
+    market at the average price of what the dug ores would sell for. Results
+    are memoized by a signature of what they depend on: ores by their prices
+    and drop amounts, events also by money, as repair costs and losses depend on it.
+    """
+    def __init__(self, event_manager, market=None, cache_size: int = 128):
+        """
+        :param event_manager: EventManager with the event weights
+        :param market: OreMarket pricing the ores, base prices without it
+        :param cache_size: memoized distributions
+        """
+        self.event_manager = event_manager
+        self.market = market
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, Distribution] = OrderedDict()
+
+    def _cached(self, key: tuple, compute) -> Distribution:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        distribution = compute()
+        self._cache[key] = distribution
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return distribution
+
+    def _ore_pool(self, state) -> list:
+        return state.mine.ore_pool() if state.mine else state.ore_pool
+
+    def prices(self, state, digs: int = 1) -> list[int]:
+        """Prices of the ore pool, each the average market price of what that many digs yield of it"""
+        ore_pool = self._ore_pool(state)
+        if self.market is None or not ore_pool or not state.item_amounts:
+            return [item.price for item in ore_pool]
+
+        amounts = self._amounts(state)
+        per_dig = sum(max(0, min(amount, state.item_capacity)) for amount in amounts) / len(amounts)
+        prices = {}
+        for name, count in Counter(item.name for item in ore_pool).items():
+            units = max(1.0, digs * per_dig * count / len(ore_pool))
+            prices[name] = round(self.market.revenue(name, units) / units)
+        return [prices[item.name] for item in ore_pool]
+
+    def ore_signature(self, state, prices: list[int]) -> tuple:
+        return (
+            tuple(sorted(prices)),
+            tuple(sorted(self._amounts(state))),
+        )
+
+    def event_signature(self, state, money: int) -> tuple:
+        return (
+            money,
+            tuple(self.event_manager.weights(state.modifiers).items()),
+        )
+
+    def _amounts(self, state) -> list[int]:
+        return [round(state.modifiers.effective("drop_amount", amount)) for amount in state.item_amounts]
+
+    def _ores(self, state, free_slots: int, prices: list[int]) -> Distribution:
+        def compute():
+            if not prices or not state.item_amounts or free_slots <= 0:
+                return Distribution.constant(0)
+
+            ore = Distribution.uniform(prices)
+            amount_chance = 1 / len(state.item_amounts)
+            return Distribution.mixture([(amount_chance, ore.power(max(0, min(amount, free_slots))))
+                                         for amount in self._amounts(state)])
+        return self._cached(("ores", self.ore_signature(state, prices), free_slots), compute)
+
+    def _events(self, state, money: int) -> Distribution:
+        """Money change of the events after a dig, at a balance of money"""
+        def compute():
+            weights = self.event_manager.weights(state.modifiers)
+            total = sum(weights.values())
+            if total <= 0:
+                return Distribution.constant(0)
+
+            balance = _Balance(money)
+            event = Distribution.mixture([(weight / total, Distribution.from_pmf(event_class.income_distribution(balance)))
+                                          for event_class, weight in weights.items()])
+            return Distribution.mixture([(1 - BASIC_EVENT_CHANCE, Distribution.constant(0)),
+                                         (BASIC_EVENT_CHANCE, event)])
+        return self._cached(("events", self.event_signature(state, money)), compute)
+
+    def _dig_key(self, state, free_slots: int, money: int | None, prices: list[int]) -> tuple:
+        return ("dig", self.ore_signature(state, prices), free_slots,
+                None if money is None else self.event_signature(state, money))
+
+    def _dig(self, state, free_slots: int, money: int | None, prices: list[int]) -> Distribution:
+        """Income of one dig, money is the balance events see, None for a dig protected from events"""
+        def compute():
+            income = self._ores(state, free_slots, prices)
+            if money is not None:
+                income = income + self._events(state, money)
+            return income
+        return self._cached(self._dig_key(state, free_slots, money, prices), compute)
+
+    def _lucky(self, state) -> Distribution:
+        if state.additional_luck >= LUCKY_EVENT_LUCK_VALUE:
+            return Distribution.from_pmf(LuckyEvent.income_distribution(state))
+        return Distribution.constant(0)
+
+    def per_dig(self, state) -> Distribution:
+        """Income distribution of the next dig"""
+        free_slots = state.item_capacity - len(state.inventory)
+        # Defence is reduced before events are checked
+        protected = state.event_defence_counter > 1
+        money = None if protected else state.money
+        return self._dig(state, free_slots, money, self.prices(state)) + self._lucky(state)
+
+    def digs_per_minute(self, state) -> int:
+        return int(60 // state.mining_time)
+
+    def _runs(self, state) -> list[tuple[int, Distribution, float]]:
+        """Digs of a minute as runs of (digs, income of one dig, balance the run starts with)
+
+        Repairs and losses depend on the balance, which every loss lowers. Risky
+        digs are split into EARNINGS_RUNS runs, each priced at the balance it is
+        expected to start with, and a run never loses more than that balance.
+        """
+        digs = self.digs_per_minute(state)
+        protected = min(digs, max(0, state.event_defence_counter - 1))
+        capacity = state.item_capacity
+        prices = self.prices(state, digs)
+        balance = state.money
+        runs = []
+        if protected:
+            dig = self._dig(state, capacity, None, prices)
+            runs.append((protected, dig, balance))
+            balance += protected * dig.mean
+
+        risky = digs - protected
+        for run in range(EARNINGS_RUNS):
+            count = risky // EARNINGS_RUNS + (run < risky % EARNINGS_RUNS)
+            if not count:
+                continue
+            dig = self._dig(state, capacity, round(balance), prices)
+            runs.append((count, dig, balance))
+            balance += max(count * dig.mean, -balance)
+        return runs
+
+    def per_minute(self, state) -> Distribution:
+        """Income distribution of a minute of digging
+
+        Assumes the inventory is sold between digs, so every dig is truncated
+        by the full item capacity, and ores are priced at the average market
+        price of a minute's sales. Losses of a minute are cut off at the
+        current balance, which is cruder than the run by run balance of
+        rate(): the means differ once losses eat into the balance.
+        """
+        # Runs follow from the dig of the current balance, the number of digs and the defence
+        digs = self.digs_per_minute(state)
+        key = ("minute", self._dig_key(state, state.item_capacity, state.money, self.prices(state, digs)), digs,
+               state.event_defence_counter, state.additional_luck >= LUCKY_EVENT_LUCK_VALUE)
+
+        def compute():
+            total = self._lucky(state)
+            for count, dig, _ in self._runs(state):
+                total = total + dig.power(count)
+            return total.at_least(-state.money)
+        return self._cached(key, compute)
+
+    def rate(self, state) -> tuple[float, float]:
+        """Expected income per minute and its variance
+
+        Uses moments of the per-dig distributions of every run, which avoids
+        building the full per-minute distribution. Digs within a run are
+        treated as independent.
+        """
+        lucky = self._lucky(state)
+        mean, variance = lucky.mean, lucky.variance
+        for count, dig, balance in self._runs(state):
+            mean += max(count * dig.mean, -balance)
+            variance += count * dig.variance
+        return mean, variance
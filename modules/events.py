@@ -1,10 +1,13 @@
-import time
 import random
+from itertools import accumulate
 
-from config import BASIC_EVENT_PRINT_DELAY, CONSQ_EVENT_PRINT_DELAY, DECREASE_SPEED_EVENT_AREA, BASIC_EVENT_CHANCE, LUCKY_EVENT_LUCK_VALUE
+from config import (BASIC_EVENT_PRINT_DELAY, CONSQ_EVENT_PRINT_DELAY, DECREASE_SPEED_EVENT_AREA, BASIC_EVENT_CHANCE,
+                    LUCKY_EVENT_LUCK_VALUE, TRAUMA_DURATION)
+from modules.modifiers import Modifier, ADDITIVE, MULTIPLICATIVE
+from modules.catalog import CATALOG
 
 class Event:
-    """Base class for events"""
+    """Base class for events, texts come from the catalog entry named after the class"""
     def __init__(self, state, state_service, ui):
         """
         :param state: GameState
@@ -15,8 +18,9 @@ class Event:
         self.state_service = state_service
         self.ui = ui
 
-        self.description = "An event has occurred."
-        self.conseq = "Nothing happened."
+        spec = CATALOG.events.get(type(self).__name__, {})
+        self.description = spec.get("description", "An event has occurred.")
+        self.conseq = spec.get("conseq", "Nothing happened.")
 
 
     def trigger(self) -> None:
@@ -24,12 +28,13 @@ class Event:
         self.ui.clear()
         
         self.ui.slowprint("Event Triggered!", delay = BASIC_EVENT_PRINT_DELAY)
-        time.sleep(1.5)
+        self.ui.pause(1.5)
         
         self.ui.clear()
         self.ui.slowprint(self.description, delay = BASIC_EVENT_PRINT_DELAY)
         
-        time.sleep(len(self.description) * BASIC_EVENT_PRINT_DELAY + 1)
+        # Reading time after the description, the typing itself already took its time
+        self.ui.pause(1)
         
         self._apply_consequence()
 
@@ -42,85 +47,123 @@ class Event:
         """Apply the consequence of the event"""
         return True
 
+    @classmethod
+    def income_distribution(cls, state) -> dict[int, float]:
+        """Exact distribution of money change caused by the event: {amount: probability}
+
+        Only state.money may be read, the earnings model asks at other balances too.
+        """
+        return {0: 1.0}
+
 class TraumaEvent(Event):
     """Trauma event logic"""
     def __init__(self, state, state_service, ui):
         super().__init__(state, state_service, ui)
-        self.description = "You suffered a traumatic injury while mining!"
-        self.conseq = "You lost some mining speed."
+        self.conseq = self.conseq.format(duration=TRAUMA_DURATION)
 
     def _apply_consequence(self) -> bool:
-        self.state_service.decrease_mining_speed(random.randint(*DECREASE_SPEED_EVENT_AREA) / 10)
+        slowdown = self.state.rng.randint(*DECREASE_SPEED_EVENT_AREA) / 10
+        self.state_service.add_modifier(Modifier("mining_time", ADDITIVE, slowdown, "TraumaEvent"),
+                                        digs=TRAUMA_DURATION)
         return True
 
 class LuckyEvent(Event):
     """Lucky event logic"""
-    def __init__(self, state, state_service, ui):
-        super().__init__(state, state_service, ui)
-        self.description = "You found a lucky break while mining!"
-        self.conseq = "You gained some money."
 
     def _apply_consequence(self) -> bool:
         if self.state.additional_luck >= LUCKY_EVENT_LUCK_VALUE:
             self.state_service.reset_luck()
 
-        self.state_service.add_money(random.randint(10, 50))
+        self.state_service.add_money(self.state.rng.randint(10, 50))
         return True
+
+    @classmethod
+    def income_distribution(cls, state) -> dict[int, float]:
+        return {amount: 1 / 41 for amount in range(10, 51)}
     
 class EquipmentFailureEvent(Event):
     """Equipment failure event logic"""
-    def __init__(self, state, state_service, ui):
-        super().__init__(state, state_service, ui)
-        self.description = "Your mining equipment has failed!"
-        self.conseq = "You lost some money to repair it."
+    min_repair_cost = 10
 
     def _apply_consequence(self) -> bool:
-        if self.state.money < 10:
+        # A player who can't pay the repair is left with broken equipment
+        self.repaired = self.state.money >= self.min_repair_cost
+        if not self.repaired:
             self.conseq = "You don't have enough money to repair the equipment. You lost all your money."
             self.state_service.deduct_money(self.state.money)
             return True
         
-        max_repair_cost = max(10, self.state.money // 2)
-        repair_cost = random.randint(10, max_repair_cost)
+        max_repair_cost = max(self.min_repair_cost, self.state.money // 2)
+        repair_cost = self.state.rng.randint(self.min_repair_cost, max_repair_cost)
 
         self.conseq = f"You paid ${repair_cost} to repair your equipment."
 
         self.state_service.deduct_money(repair_cost)
         return True
 
+    @classmethod
+    def income_distribution(cls, state) -> dict[int, float]:
+        if state.money < cls.min_repair_cost:
+            return {-state.money: 1.0}
+
+        max_repair_cost = max(cls.min_repair_cost, state.money // 2)
+        chance = 1 / (max_repair_cost - cls.min_repair_cost + 1)
+        return {-cost: chance for cost in range(cls.min_repair_cost, max_repair_cost + 1)}
+
 
 class EventManager:
     """Manages random events with probabilities"""
     
-    def __init__(self, logger):
+    def __init__(self, logger, rng: random.Random = random):
+        """
+        :param logger: logger of triggered events
+        :param rng: random stream to draw events from, simulations pass their own
+        """
         self.logger = logger
-        self.events_chances = {
-            TraumaEvent: 0.1, 
-            Event: 0.1,
-            LuckyEvent: 0.1,
-            EquipmentFailureEvent: 0.1,
-            HelpStrangerEvent: 0.1,
-        }
+        self.rng = rng
+        self.events_chances = {event_class(name): weight
+                               for name, weight in zip(CATALOG.event_names, CATALOG.event_weights)}
+        # Sampling table (events, cumulative weights) of events_chances, dropped when a chance changes
+        self._table: tuple[list, list[float]] | None = (list(self.events_chances), CATALOG.event_cum_weights)
     
     def should_trigger(self) -> bool:
         """Determine if an event should be triggered based on BASIC_EVENT_CHANCE"""
-        return random.random() < BASIC_EVENT_CHANCE
+        return self.rng.random() < BASIC_EVENT_CHANCE
     
-    def get_random_event(self):
+    def weights(self, modifiers=None) -> dict:
+        """Event weights with `event_weight:<EventName>` modifiers applied"""
+        if modifiers is None or not modifiers.stats("event_weight:"):
+            return self.events_chances
+        return {event: max(0, modifiers.effective(f"event_weight:{event.__name__}", chance))
+                for event, chance in self.events_chances.items()}
+
+    def get_random_event(self, modifiers=None):
         """Return a random event based on probabilities"""
-        return random.choices(
-            list(self.events_chances.keys()), 
-            weights=list(self.events_chances.values()), 
+        weights = self.weights(modifiers)
+        if weights is self.events_chances:
+            if self._table is None:
+                self._table = (list(weights), list(accumulate(weights.values())))
+            events, cum_weights = self._table
+            return self.rng.choices(events, cum_weights=cum_weights, k=1)[0]
+        return self.rng.choices(
+            list(weights.keys()), 
+            weights=list(weights.values()), 
             k=1
         )[0]
     
-    def trigger_random_event(self, state, state_service, ui):
-        """Trigger a random event if conditions are met"""
+    def trigger_random_event(self, state, state_service, ui, cause: str = "dig"):
+        """Trigger a random event if conditions are met
+
+        Every check is logged with its cause, so log analytics can tell
+        the per-dig event rate apart from timed checks.
+        """
         if self.should_trigger():
-            event_class = self.get_random_event()
+            event_class = self.get_random_event(state.modifiers)
             event = event_class(state, state_service, ui)
             event.trigger()
-            self.logger.info(f"Random event triggered: {event_class.__name__}")
+            self.logger.info(f"Random event triggered after {cause}: {event_class.__name__}")
+        else:
+            self.logger.info(f"No event after {cause}")
 
     def trigger_specific_event(self, event_class, state, state_service, ui):
         """Trigger a specific event"""
@@ -131,6 +174,7 @@ class EventManager:
     def increase_event_chance(self, event: Event, delta: float)-> dict | None:
         if event in self.events_chances:
             self.events_chances[event] = self.events_chances[event] + min(0.1, delta)
+            self._table = None
             return self.events_chances
         
         return
@@ -138,6 +182,7 @@ class EventManager:
     def reduce_event_chance(self, event: Event, delta: float) -> dict | None:
         if event in self.events_chances:
             self.events_chances[event] = self.events_chances[event] - max(0, delta)
+            self._table = None
             return self.events_chances
         
         return
@@ -153,12 +198,15 @@ class Consequence:
         """Apply the consequence to the game state"""
         raise NotImplementedError("Subclasses must implement apply()")
 
+    def money_delta(self) -> int:
+        """Money change caused by apply()"""
+        return 0
+
 
 class EventWithChoice(Event):
     """Base class for events with player choices
     
-    Subclasses should define:
-    - self.description: event description
+    Choices are read from the catalog entry's "choices" into:
     - self.available_choices: dict {"key": "display name"}
     - self.choice_consequences: dict {"key": {"good": [Consequence], "bad": [Consequence]}}
     """
@@ -169,12 +217,22 @@ class EventWithChoice(Event):
         self.choice_consequences = {}
         self.selected_consequence = None
 
+        for key, choice in CATALOG.events.get(type(self).__name__, {}).get("choices", {}).items():
+            self.available_choices[key] = choice["label"]
+            self.choice_consequences[key] = {outcome: [self._consequence(entry) for entry in choice[outcome]]
+                                             for outcome in ("good", "bad")}
+
+    def _consequence(self, entry: dict):
+        """Callable building the consequence of a catalog entry"""
+        consequence_type = CONSEQUENCE_TYPES[entry["type"]]
+        return lambda: consequence_type(self.state, self.state_service, entry["amount"], entry["description"])
+
     def trigger(self) -> None:
         """Trigger the event with choice"""
         self.ui.clear()
         
         self.ui.slowprint("Event Triggered!", delay=BASIC_EVENT_PRINT_DELAY)
-        time.sleep(1.5)
+        self.ui.pause(1.5)
         
         self.ui.clear()
         self.ui.slowprint(self.description, delay=BASIC_EVENT_PRINT_DELAY)
@@ -206,13 +264,29 @@ class EventWithChoice(Event):
         
         return list(self.available_choices.keys())[0]
 
+    @classmethod
+    def income_distribution(cls, state) -> dict[int, float]:
+        """Money change assuming every choice is equally likely"""
+        event = cls(state, None, None)
+        distribution: dict[int, float] = {}
+        choice_chance = 1 / len(event.choice_consequences)
+
+        for pool in event.choice_consequences.values():
+            for consequences in pool.values():
+                for consequence_callable in consequences:
+                    amount = consequence_callable().money_delta()
+                    chance = choice_chance / len(pool) / len(consequences)
+                    distribution[amount] = distribution.get(amount, 0) + chance
+
+        return distribution
+
     def _select_consequence(self, choice: str) -> Consequence:
         """Randomly select good or bad consequence for the choice"""
         consequence_pool = self.choice_consequences[choice]
         
         # 50/50 chance for good or bad
-        consequence_type = random.choice(["good", "bad"])
-        consequence_callable = random.choice(consequence_pool[consequence_type])
+        consequence_type = self.state.rng.choice(["good", "bad"])
+        consequence_callable = self.state.rng.choice(consequence_pool[consequence_type])
         
         return consequence_callable()
 
@@ -226,6 +300,9 @@ class MoneyGainConsequence(Consequence):
     def apply(self) -> bool:
         self.state_service.add_money(self.amount)
         return True
+
+    def money_delta(self) -> int:
+        return self.amount
     
 class SpeedGainConsequence(Consequence):
     def __init__(self, state, state_service, gain, description):
@@ -234,7 +311,7 @@ class SpeedGainConsequence(Consequence):
         self.description = description
     
     def apply(self) -> bool:
-        self.state_service.increase_mining_speed(self.gain)
+        self.state_service.add_modifier(Modifier("mining_time", MULTIPLICATIVE, 1 - self.gain, "SpeedGainConsequence"))
         return True
 
 class MoneyLossConsequence(Consequence):
@@ -249,6 +326,9 @@ class MoneyLossConsequence(Consequence):
         self.state_service.deduct_money(self.amount)
         return True
 
+    def money_delta(self) -> int:
+        return -self.amount if self.state.money >= self.amount else 0
+
 
 class SpeedLossConsequence(Consequence):
     def __init__(self, state, state_service, loss, description):
@@ -257,7 +337,7 @@ class SpeedLossConsequence(Consequence):
         self.description = description
     
     def apply(self) -> bool:
-        self.state_service.decrease_mining_speed(self.loss)
+        self.state_service.add_modifier(Modifier("mining_time", MULTIPLICATIVE, 1 + self.loss, "SpeedLossConsequence"))
         return True
     
 class HelpStrangerEvent(EventWithChoice):
@@ -265,35 +345,35 @@ class HelpStrangerEvent(EventWithChoice):
     Player can choose to help a stranger or ignore them.
     Each choice leads to random good/bad consequences.
     """
-    def __init__(self, state, state_service, ui):
-        super().__init__(state, state_service, ui)
-        self.description = "A stranger asks you for help. What do you do?"
-        
-        self.available_choices = {
-            "1": "Help them",
-            "2": "Ignore and walk away"
-        }
-        
-        self.choice_consequences = {
-            "1": {  # Help
-                "good": [
-                    lambda s=state, ss=state_service: MoneyGainConsequence(s, ss, 50, "They thanked you! +$50"),
-                    lambda s=state, ss=state_service: SpeedGainConsequence(s, ss, 0.05, "They blessed you! +5%")
-                ],
-                "bad": [
-                    lambda s=state, ss=state_service: MoneyLossConsequence(s, ss, 20, "They took your money! -$20"),
-                    lambda s=state, ss=state_service: SpeedLossConsequence(s, ss, 0.05, "They cursed you! -5%")
-                ]
-            },
-            "2": {  # Ignore
-                "good": [
-                    lambda s=state, ss=state_service: MoneyGainConsequence(s, ss, 30, "You found some loose change! +$30"),
-                    lambda s=state, ss=state_service: SpeedGainConsequence(s, ss, 0.05, "You were blessed with good luck! Mining speed +5%")
-                ],
-
-                "bad": [
-                    lambda s=state, ss=state_service: MoneyLossConsequence(s, ss, 10, "You got bad karma! -$10"),
-                    lambda s=state, ss=state_service: SpeedLossConsequence(s, ss, 0.05, "You were cursed! Mining speed -5%")
-                ]
-            }
-        }
\ No newline at end of file
+
+
+EVENT_BEHAVIOURS = {
+    "Event": Event,
+    "TraumaEvent": TraumaEvent,
+    "LuckyEvent": LuckyEvent,
+    "EquipmentFailureEvent": EquipmentFailureEvent,
+    "EventWithChoice": EventWithChoice,
+    "HelpStrangerEvent": HelpStrangerEvent,
+}
+
+CONSEQUENCE_TYPES = {
+    "money_gain": MoneyGainConsequence,
+    "money_loss": MoneyLossConsequence,
+    "speed_gain": SpeedGainConsequence,
+    "speed_loss": SpeedLossConsequence,
+}
+
+_event_classes: dict[str, type[Event]] = {}
+
+
+def event_class(name: str) -> type[Event]:
+    """Class of a catalog event, events reusing another behaviour get a subclass named after them"""
+    event = _event_classes.get(name)
+    if event is None:
+        if name in EVENT_BEHAVIOURS:
+            event = EVENT_BEHAVIOURS[name]
+        else:
+            behaviour = EVENT_BEHAVIOURS[CATALOG.event(name).get("behaviour", "Event")]
+            event = type(name, (behaviour,), {"__module__": __name__})
+        _event_classes[name] = event
+    return event
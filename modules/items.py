@@ -1,4 +1,11 @@
+from collections.abc import Mapping, Sequence
+
+from modules.catalog import CATALOG
+
+
 class Item:
+    __slots__ = ("name", "price", "chance")
+
     def __init__(self):
         self.name = ""
         self.price = 0
@@ -27,59 +34,60 @@ class Item:
     
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(name={self.name}, price={self.price})"
-    
-class Stone(Item):
-    def __init__(self):
-        self.name = "Stone"
-        self.price = 2
-        self.chance = 0.4
 
-class Coal(Item):
-    def __init__(self):
-        self.name = "Coal"
-        self.price = 5
-        self.chance = 0.3
-    
-class Iron(Item):
-    def __init__(self):
-        self.name = "Iron"
-        self.price = 15
-        self.chance = 0.2
 
-    
-class Gold(Item):
-    def __init__(self):
-        self.name = "Gold"
-        self.price = 30
-        self.chance = 0.1
+def _ore_class(name: str) -> type[Item]:
+    """Item subclass of a catalog ore, named after the ore"""
+    price, chance = CATALOG.ores[name]
 
-    
-class Diamond(Item):
     def __init__(self):
-        self.name = "Diamond"
-        self.price = 75
-        self.chance = 0.05
+        self.name = name
+        self.price = price
+        self.chance = chance
 
-class Emerald(Item):
-    def __init__(self):
-        self.name = "Emerald"
-        self.price = 100
-        self.chance = 0.03
+    return type(name, (Item,), {"__slots__": (), "__init__": __init__, "__module__": __name__})
 
-class Ruby(Item):
+
+class OreRegistry(Mapping):
+    """Ore classes by name, a class is created the first time it is looked up"""
     def __init__(self):
-        self.name = "Ruby"
-        self.price = 150
-        self.chance = 0.02
-
-ITEM_REGISTRY = {
-    "Stone": Stone,
-    "Coal": Coal,
-    "Iron": Iron,
-    "Gold": Gold,
-    "Diamond": Diamond,
-    "Emerald": Emerald,
-    "Ruby": Ruby
-}
-
-ORE_POOL = [Stone, Coal, Iron, Gold, Diamond, Emerald, Ruby]
\ No newline at end of file
+        self._classes: dict[str, type[Item]] = {}
+
+    def __getitem__(self, name: str) -> type[Item]:
+        ore = self._classes.get(name)
+        if ore is None:
+            if name not in CATALOG.ores:
+                raise KeyError(name)
+            ore = self._classes[name] = _ore_class(name)
+        return ore
+
+    def __contains__(self, name) -> bool:
+        return name in CATALOG.ores
+
+    def __iter__(self):
+        return iter(CATALOG.ore_names)
+
+    def __len__(self):
+        return len(CATALOG.ore_names)
+
+
+class OrePool(Sequence):
+    """Ore classes in catalog order, indexes match Catalog.ore_index"""
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ITEM_REGISTRY[name] for name in CATALOG.ore_names[index]]
+        return ITEM_REGISTRY[CATALOG.ore_names[index]]
+
+    def __len__(self):
+        return len(CATALOG.ore_names)
+
+
+ITEM_REGISTRY = OreRegistry()
+ORE_POOL = OrePool()
+
+
+def __getattr__(name: str):
+    # `from modules.items import Stone` keeps working for catalog ores
+    if name in ITEM_REGISTRY:
+        return ITEM_REGISTRY[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
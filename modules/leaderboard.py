@@ -0,0 +1,202 @@
+import json
+from bisect import bisect_left, insort
+from itertools import chain, islice
+
+from modules.catalog import CATALOG
+from modules.storage import FileLock, atomic_write, read_json
+
+
+def _ore_rarity(name: str) -> float:
+    """Sort key for the rarest ore metric: lower chance means rarer"""
+    if name in CATALOG.ores:
+        return CATALOG.chance(name)
+    return float("inf")
+
+
+# metric name -> (sort key, descending)
+LEADERBOARD_METRICS = {
+    "money": (float, True),
+    "lifetime_earnings": (float, True),
+    "rarest_ore": (_ore_rarity, False),
+    "mining_time": (float, False),
+}
+
+
+class BlockedSortedList:
+    """Sorted list of unique entries split into blocks of at most 2 * block_size
+
+    An insert or removal is a bisect over the block maxima plus a bisect and a
+    move inside one block, O(log n + block_size) instead of moving the whole
+    list. Positions add up the lengths of the blocks before, O(n / block_size).
+    """
+    def __init__(self, block_size: int = 512):
+        self.block_size = block_size
+        self._blocks: list[list] = []
+        self._maxes: list = []
+        self._len = 0
+
+    def add(self, entry):
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._maxes.append(entry)
+            self._len = 1
+            return
+
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._blocks):
+            i -= 1
+            self._blocks[i].append(entry)
+            self._maxes[i] = entry
+        else:
+            insort(self._blocks[i], entry)
+        self._len += 1
+
+        block = self._blocks[i]
+        if len(block) > 2 * self.block_size:
+            tail = block[self.block_size:]
+            del block[self.block_size:]
+            self._blocks.insert(i + 1, tail)
+            self._maxes[i] = block[-1]
+            self._maxes.insert(i + 1, tail[-1])
+
+    def remove(self, entry):
+        i = bisect_left(self._maxes, entry)
+        block = self._blocks[i]
+        del block[bisect_left(block, entry)]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i]
+            del self._maxes[i]
+
+    def index(self, entry) -> int:
+        """Position of an entry in the list"""
+        i = bisect_left(self._maxes, entry)
+        return sum(len(block) for block in self._blocks[:i]) + bisect_left(self._blocks[i], entry)
+
+    def head(self, k: int) -> list:
+        """First k entries"""
+        return list(islice(chain.from_iterable(self._blocks), k))
+
+    def __len__(self):
+        return self._len
+
+
+class RankIndex:
+    """Sorted index of profiles for a single metric
+
+    Entries are kept as (key, profile) pairs in a BlockedSortedList, so moving a
+    profile only shifts entries within two blocks and reading the top k walks
+    the first blocks.
+    """
+    def __init__(self, key=float, descending: bool = True):
+        self.key = key
+        self.descending = descending
+        self._entries = BlockedSortedList()
+        self._keys: dict[str, tuple] = {}
+
+    def _entry(self, profile: str, value) -> tuple:
+        key = self.key(value)
+        return (-key if self.descending else key, profile)
+
+    def update(self, profile: str, value) -> bool:
+        """Insert or move a profile. Returns False if nothing changed"""
+        entry = self._entry(profile, value)
+        old = self._keys.get(profile)
+        if old == entry:
+            return False
+
+        if old is not None:
+            self._entries.remove(old)
+        self._entries.add(entry)
+        self._keys[profile] = entry
+        return True
+
+    def remove(self, profile: str):
+        old = self._keys.pop(profile, None)
+        if old is not None:
+            self._entries.remove(old)
+
+    def top(self, k: int = 10) -> list[str]:
+        """Return the first k profiles"""
+        return [profile for _, profile in self._entries.head(k)]
+
+    def rank(self, profile: str) -> int | None:
+        """Return 1-based rank of a profile, or None if it is not ranked"""
+        entry = self._keys.get(profile)
+        if entry is None:
+            return None
+        return self._entries.index(entry) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Leaderboard:
+    """Global leaderboards by money, lifetime earnings, rarest ore and mining time
+
+    Indexes are built once from the leaderboard file and then kept up to date by
+    GameStateService, so ranking never needs to look at other players' saves.
+    """
+    def __init__(self, path: str = "leaderboard.json"):
+        self.path = path
+        self._records: dict[str, dict] = {}
+        self._dirty: set[str] = set()
+        self._indexes: dict[str, RankIndex] | None = None
+
+    @property
+    def indexes(self) -> dict[str, RankIndex]:
+        """Indexes are built from the leaderboard file on first use"""
+        if self._indexes is None:
+            self._indexes = {metric: RankIndex(key, descending)
+                             for metric, (key, descending) in LEADERBOARD_METRICS.items()}
+            records = read_json(self.path, {})
+            for profile, record in records.items():
+                self._apply(profile, record)
+        return self._indexes
+
+    def _apply(self, profile: str, metrics: dict) -> bool:
+        changed = False
+        record = self._records.setdefault(profile, {})
+        for metric, value in metrics.items():
+            if metric not in self.indexes or value in (None, ""):
+                continue
+            if self.indexes[metric].update(profile, value):
+                record[metric] = value
+                changed = True
+        return changed
+
+    def update(self, profile: str, **metrics) -> bool:
+        """Update metrics of a profile. Only changed metrics are re-indexed"""
+        if not profile:
+            return False
+
+        if self._apply(profile, metrics):
+            self._dirty.add(profile)
+            return True
+        return False
+
+    def top(self, metric: str, k: int = 10) -> list[tuple[str, object]]:
+        """Return the top k (profile, value) pairs for a metric"""
+        return [(profile, self._records[profile][metric]) for profile in self.indexes[metric].top(k)]
+
+    def rank(self, metric: str, profile: str) -> int | None:
+        return self.indexes[metric].rank(profile)
+
+    def get(self, profile: str) -> dict:
+        self.indexes  # records are loaded together with the indexes
+        return dict(self._records.get(profile, {}))
+
+    def save(self):
+        """Write changed profiles, keeping records written by other sessions"""
+        if not self._dirty:
+            return
+
+        # Read-merge-write under the lock, so sessions never drop each other's profiles
+        with FileLock(self.path):
+            records = read_json(self.path, {})
+            for profile in self._dirty:
+                records[profile] = self._records[profile]
+            atomic_write(self.path, json.dumps(records))
+        self._dirty.clear()
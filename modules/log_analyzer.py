@@ -0,0 +1,252 @@
+"""Streaming analytics over game.log
+
+Usage: python -m modules.log_analyzer [game.log ...] [--checkpoint PATH] [--json] [--reset]
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from config import BASIC_EVENT_CHANCE
+from modules.catalog import CATALOG
+from modules.events import EventManager
+
+# Bumped when checkpoint entries change, older checkpoints are parsed again from scratch
+CHECKPOINT_FORMAT = 3
+HEAD_BYTES = 256  # leading bytes that identify a log across renames, copies and compression
+
+
+class SessionColumns:
+    """Columnar per-session aggregates
+
+    Every column is a list with one value per session. Ore and event columns
+    are created on first sight and back-filled with zeros.
+    """
+    BASE_COLUMNS = ("player", "digs", "money_in", "money_out", "event_checks", "events")
+
+    def __init__(self, columns: dict | None = None):
+        self.columns: dict[str, list] = columns or {name: [] for name in self.BASE_COLUMNS}
+
+    def __len__(self):
+        return len(self.columns["player"])
+
+    def new_session(self, player: str):
+        for name, column in self.columns.items():
+            column.append(player if name == "player" else 0)
+
+    def add(self, column: str, value: int | float = 1):
+        if not len(self):
+            self.new_session("")
+        if column not in self.columns:
+            self.columns[column] = [0] * len(self)
+        self.columns[column][-1] += value
+
+    def total(self, column: str) -> int | float:
+        return sum(self.columns.get(column, ()))
+
+    def totals(self, prefix: str) -> dict[str, int]:
+        """Sum every column starting with prefix, keyed by the rest of its name"""
+        return {name[len(prefix):]: sum(column) for name, column in self.columns.items()
+                if name.startswith(prefix)}
+
+
+class LogAnalyzer:
+    """Incremental parser of game.log lines into SessionColumns
+
+    Progress is kept as a byte offset per file in a checkpoint, together with the
+    aggregates, so re-runs only read lines appended since the last run. Files
+    are known by device and inode, and by a hash of their first bytes: a log
+    renamed by rotation keeps its inode, a copied or compressed one keeps its
+    start, either way it continues at the saved offset instead of being counted
+    twice.
+    """
+    def __init__(self, checkpoint_path: str = "game.log.checkpoint"):
+        self.checkpoint_path = checkpoint_path
+        self.files: dict[str, dict] = {}
+        self.sessions = SessionColumns()
+
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("format") == CHECKPOINT_FORMAT:
+                self.files = checkpoint["files"]
+                self.sessions = SessionColumns(checkpoint["columns"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def save_checkpoint(self):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"format": CHECKPOINT_FORMAT, "files": self.files, "columns": self.sessions.columns}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def discover(path: str = "game.log") -> list[str]:
+        """Return a log and its rotated siblings, oldest first"""
+        def rotation(name: str) -> int:
+            suffix = name[len(path) + 1:].split(".")[0]
+            return int(suffix) if suffix.isdigit() else 0
+
+        rotated = [name for name in glob.glob(glob.escape(path) + ".*")
+                   if rotation(name) > 0]
+        rotated.sort(key=rotation, reverse=True)
+        return rotated + ([path] if os.path.exists(path) else [])
+
+    def process(self, paths: list[str]) -> int:
+        """Parse new data of every file, returns number of parsed lines"""
+        parsed = 0
+        for path in paths:
+            parsed += self._process_file(path)
+        return parsed
+
+    @staticmethod
+    def _same_start(progress: dict, head: bytes) -> bool:
+        length = progress["head_len"]
+        return 0 < length <= len(head) and hashlib.sha1(head[:length]).hexdigest() == progress["head"]
+
+    def _progress(self, identity: str, head: bytes, size: int, compressed: bool) -> dict | None:
+        """Saved progress of a file, None if its content was never seen"""
+        progress = self.files.get(identity)
+        if progress:
+            if self._same_start(progress, head) and (compressed or progress["offset"] <= size):
+                return progress
+            # Truncated log or reused inode, the old content may still turn up as a rotated copy
+            self.files[f"{identity}:{progress['head']}"] = self.files.pop(identity)
+
+        # A copy of a known log, made by copy-and-truncate rotation or compression
+        for known in self.files.values():
+            if self._same_start(known, head):
+                return known
+        return None
+
+    def _process_file(self, path: str) -> int:
+        stat = os.stat(path)
+        identity = f"{stat.st_dev}:{stat.st_ino}"
+        compressed = path.endswith(".gz")
+        parsed = 0
+
+        opener = gzip.open if compressed else open
+        with opener(path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+            progress = self._progress(identity, head, stat.st_size, compressed)
+            # Compressed logs never grow, a known one is done
+            if compressed and progress is self.files.get(identity) and progress["size"] == stat.st_size:
+                return 0
+
+            offset = progress["offset"] if progress else 0
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Incomplete line is still being written
+                    break
+                offset += len(line)
+                self.parse_line(line.decode("utf-8", errors="replace"))
+                parsed += 1
+
+        self.files[identity] = {"path": path, "size": stat.st_size, "offset": offset,
+                                "head": hashlib.sha1(head).hexdigest(), "head_len": len(head)}
+        return parsed
+
+    def parse_line(self, line: str):
+        parts = line.rstrip("\n").split(" - ", 2)
+        if len(parts) < 3:
+            return
+        message = parts[2]
+        sessions = self.sessions
+
+        if message.startswith("Player "):
+            if message.endswith(" logged in"):
+                sessions.new_session(message[7:-10])
+            elif message.endswith(" registered"):
+                sessions.new_session(message[7:-11])
+        elif message.startswith("Dug ") and message.endswith(" ores"):
+            sessions.add("digs")
+        elif message.startswith("Added $"):
+            sessions.add("money_in", float(message[7:message.index(",")]))
+        elif message.startswith("Deducted $"):
+            sessions.add("money_out", float(message[10:message.index(",")]))
+        elif message.startswith("Added ") and message.endswith(" to inventory"):
+            sessions.add("ore:" + message[6:-13])
+        elif message.startswith("Random event triggered after dig: "):
+            sessions.add("event_checks")
+            sessions.add("events")
+            sessions.add("event:" + message[34:])
+        elif message == "No event after dig":
+            sessions.add("event_checks")
+        elif message.startswith("Random event triggered after timer: "):
+            sessions.add("timed_event:" + message[36:])
+
+    def summary(self) -> dict:
+        """Aggregate all sessions into drop-rate and event-rate figures"""
+        sessions = self.sessions
+        digs = sessions.total("digs")
+        ores = sessions.totals("ore:")
+        checks = sessions.total("event_checks")
+        events = sessions.totals("event:")
+        mined = sum(ores.values())
+
+        # Base ore chances, deeper mine levels shift drops towards pricier ores
+        total_chance = sum(CATALOG.ore_chances)
+        expected_drops = {name: chance / total_chance for name, chance in zip(CATALOG.ore_names, CATALOG.ore_chances)}
+
+        weights = EventManager(logging.getLogger(__name__)).events_chances
+        total_weight = sum(weights.values())
+        expected_events = {event.__name__: BASIC_EVENT_CHANCE * weight / total_weight
+                           for event, weight in weights.items()}
+
+        return {
+            "sessions": len(sessions),
+            "digs": digs,
+            "money_in": sessions.total("money_in"),
+            "money_out": sessions.total("money_out"),
+            "ores": ores,
+            "drop_rates": {name: count / mined for name, count in ores.items()} if mined else {},
+            "expected_drop_rates": expected_drops,
+            "event_checks": checks,
+            "event_rates": {name: events.get(name, 0) / checks for name in expected_events} if checks else {},
+            "timed_events": sessions.totals("timed_event:"),
+            "expected_event_rates": expected_events,
+        }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Analyze PyMiner game logs")
+    parser.add_argument("paths", nargs="*", help="log files, default: game.log and its rotations")
+    parser.add_argument("--checkpoint", default="game.log.checkpoint")
+    parser.add_argument("--reset", action="store_true", help="ignore the checkpoint and parse everything")
+    parser.add_argument("--json", action="store_true", help="print summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    analyzer = LogAnalyzer(args.checkpoint)
+    analyzer.process(args.paths or LogAnalyzer.discover())
+    analyzer.save_checkpoint()
+    summary = analyzer.summary()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"sessions: {summary['sessions']}  digs: {summary['digs']}")
+    print(f"money in: ${summary['money_in']:.0f}  money out: ${summary['money_out']:.0f}\n")
+    print("ore drops (observed / expected share)")
+    for name, count in sorted(summary["ores"].items(), key=lambda item: -item[1]):
+        expected = summary["expected_drop_rates"].get(name, 0)
+        print(f"  {name}: {count} ({summary['drop_rates'][name]:.1%} / {expected:.1%})")
+    print(f"\nevents per dig, {summary['event_checks']} checks (observed / expected)")
+    for name, expected in summary["expected_event_rates"].items():
+        observed = summary["event_rates"].get(name, 0)
+        print(f"  {name}: {observed:.2%} / {expected:.2%}")
+    if summary["timed_events"]:
+        print("\ntimed events (not per dig)")
+        for name, count in sorted(summary["timed_events"].items(), key=lambda item: -item[1]):
+            print(f"  {name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
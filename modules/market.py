@@ -0,0 +1,111 @@
+import json
+import math
+import time
+from collections import Counter
+
+from config import MARKET_HALF_LIFE, MARKET_DEPTH, MARKET_PRICE_FLOOR
+from modules.items import Item
+from modules.catalog import CATALOG
+from modules.storage import FileLock, atomic_write, read_json
+
+DECAY_RATE = math.log(2) / MARKET_HALF_LIFE
+
+
+class DecayedCounter:
+    """Sum that halves every MARKET_HALF_LIFE seconds
+
+    Kept as a value at a timestamp, so adding to it and reading it are O(1)
+    no matter how many sales went into it.
+    """
+    __slots__ = ("value", "timestamp")
+
+    def __init__(self, value: float = 0.0, timestamp: float = 0.0):
+        self.value = value
+        self.timestamp = timestamp
+
+    def at(self, now: float) -> float:
+        return self.value * math.exp(-DECAY_RATE * max(0.0, now - self.timestamp))
+
+    def add(self, amount: float, now: float):
+        now = max(now, self.timestamp)
+        self.value = self.at(now) + amount
+        self.timestamp = now
+
+
+class OreMarket:
+    """Ore sell prices that drop with recently sold volume and recover over time
+
+    Unit price at decayed supply S is base * (floor + (1 - floor) * exp(-S / depth)).
+    A bulk sale of n units pays the integral of that curve from S to S + n, so
+    selling at once or one by one pays the same.
+    """
+    def __init__(self, path: str | None = "market.json", clock=time.time):
+        """
+        :param path: market file shared by all profiles, None keeps the market in memory
+        :param clock: source of timestamps in seconds
+        """
+        self.path = path
+        self.clock = clock
+        self._supply: dict[str, DecayedCounter] = {}
+        # Sold since the last save, merged into the file on save
+        self._unsaved: dict[str, DecayedCounter] = {}
+
+        if self.path is not None:
+            self._supply = self._read()
+
+    def _read(self) -> dict[str, DecayedCounter]:
+        return {name: DecayedCounter(value, timestamp)
+                for name, (value, timestamp) in read_json(self.path, {}).items()}
+
+    def base_price(self, name: str) -> float:
+        return CATALOG.price(name)
+
+    def supply(self, name: str) -> float:
+        """Decayed number of units of an ore sold recently"""
+        counter = self._supply.get(name)
+        return counter.at(self.clock()) if counter else 0.0
+
+    def quote(self, name: str) -> float:
+        """Price of the next unit"""
+        decay = math.exp(-self.supply(name) / MARKET_DEPTH)
+        return self.base_price(name) * (MARKET_PRICE_FLOOR + (1 - MARKET_PRICE_FLOOR) * decay)
+
+    def revenue(self, name: str, count: int) -> float:
+        """Money for selling count units now, without selling them"""
+        supply = self.supply(name)
+        curve = MARKET_DEPTH * (math.exp(-supply / MARKET_DEPTH) - math.exp(-(supply + count) / MARKET_DEPTH))
+        return self.base_price(name) * (MARKET_PRICE_FLOOR * count + (1 - MARKET_PRICE_FLOOR) * curve)
+
+    def value(self, items: list[Item]) -> int:
+        """Money the items would sell for together"""
+        return round(sum(self.revenue(name, count) for name, count in Counter(item.name for item in items).items()))
+
+    def sell(self, items: list[Item]) -> int:
+        """Sell items in one bulk sale and return the money paid"""
+        now = self.clock()
+        total = 0.0
+        for name, count in Counter(item.name for item in items).items():
+            total += self.revenue(name, count)
+            self._supply.setdefault(name, DecayedCounter()).add(count, now)
+            self._unsaved.setdefault(name, DecayedCounter()).add(count, now)
+        return round(total)
+
+    def copy(self) -> "OreMarket":
+        """In-memory copy for forked states, its sales never reach the file"""
+        copy = OreMarket(None, self.clock)
+        copy._supply = {name: DecayedCounter(c.value, c.timestamp) for name, c in self._supply.items()}
+        return copy
+
+    def save(self):
+        """Add own sales to the market file, picking up sales of other sessions"""
+        if self.path is None or not self._unsaved:
+            return
+
+        now = self.clock()
+        with FileLock(self.path):
+            supply = self._read()
+            for name, sold in self._unsaved.items():
+                supply.setdefault(name, DecayedCounter()).add(sold.at(now), now)
+            atomic_write(self.path, json.dumps({name: [c.value, c.timestamp] for name, c in supply.items()}))
+        self._supply = supply
+        self._unsaved.clear()
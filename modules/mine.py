@@ -0,0 +1,108 @@
+import random
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+
+from config import (MINE_CHUNK_SIZE, MINE_LEVEL_WIDTH, MINE_CACHE_SIZE, MINE_TUNNEL_CHANCE,
+                    MINE_DEPTH_BONUS)
+from modules.items import ORE_POOL, Item
+from modules.catalog import CATALOG
+
+# One byte per cell while the catalog has fewer ores than EMPTY, two bytes beyond that
+CELL_TYPE = "B" if len(CATALOG.ore_names) < 0xFF else "H"
+EMPTY = 0xFF if CELL_TYPE == "B" else 0xFFFF  # tunnel or already mined cell
+
+
+class Mine:
+    """Seeded procedural mine of depth levels made of chunks
+
+    Chunks are generated on first visit from the seed and coordinates and kept
+    in a bounded LRU cache. Digging only moves forward along the tunnel, so
+    every cell before the position is mined: seed and position restore the
+    whole mine, an evicted chunk is generated again and mined up to the position.
+    """
+    def __init__(self, seed: int, position: list[int] | None = None):
+        """
+        :param seed: world seed
+        :param position: [level, x, cell] of the next cell to dig
+        """
+        self.seed = seed
+        self.level, self.x, self.cell = position or [0, 0, 0]
+
+        self._cache: OrderedDict[tuple[int, int], array] = OrderedDict()
+        # Cumulative ore weights by level, for sampling cells
+        self._level_tables: dict[int, list[float]] = {}
+
+    @property
+    def position(self) -> list[int]:
+        return [self.level, self.x, self.cell]
+
+    def ore_weights(self, level: int) -> list[float]:
+        """Ore weights at a depth: Item.chance, shifted towards pricier ores deeper down"""
+        bonus = 1 + MINE_DEPTH_BONUS * level
+        return [chance * bonus ** rank for chance, rank in zip(CATALOG.ore_chances, CATALOG.ore_price_ranks)]
+
+    def _level_table(self, level: int) -> list[float]:
+        table = self._level_tables.get(level)
+        if table is None:
+            table = self._level_tables[level] = list(accumulate(self.ore_weights(level)))
+        return table
+
+    def generate(self, level: int, x: int) -> array:
+        """Build a chunk from seed and coordinates, same input gives the same chunk"""
+        rng = random.Random(f"{self.seed}:{level}:{x}")
+        cum_weights = self._level_table(level)
+        indices = range(len(ORE_POOL))
+
+        cells = array(CELL_TYPE, [EMPTY]) * MINE_CHUNK_SIZE
+        for i in range(MINE_CHUNK_SIZE):
+            if rng.random() >= MINE_TUNNEL_CHANCE:
+                cells[i] = rng.choices(indices, cum_weights=cum_weights)[0]
+        return cells
+
+    def chunk(self, level: int, x: int) -> array:
+        """Cells of a chunk as they are now, mined up to the position"""
+        key = (level, x)
+        cells = self._cache.get(key)
+        if cells is not None:
+            self._cache.move_to_end(key)
+            return cells
+
+        if key < (self.level, self.x):
+            cells = array(CELL_TYPE, [EMPTY]) * MINE_CHUNK_SIZE
+        else:
+            cells = self.generate(level, x)
+            if key == (self.level, self.x):
+                cells[:self.cell] = array(CELL_TYPE, [EMPTY]) * self.cell
+
+        self._cache[key] = cells
+        if len(self._cache) > MINE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return cells
+
+    def _advance(self):
+        self.cell = 0
+        self.x += 1
+        if self.x >= MINE_LEVEL_WIDTH:
+            self.x = 0
+            self.level += 1
+
+    def take(self, count: int) -> list[Item]:
+        """Dig along the tunnel and return up to count ores"""
+        items = []
+        while len(items) < count:
+            cells = self.chunk(self.level, self.x)
+            while self.cell < MINE_CHUNK_SIZE and len(items) < count:
+                ore_index = cells[self.cell]
+                if ore_index != EMPTY:
+                    items.append(ORE_POOL[ore_index]())
+                    cells[self.cell] = EMPTY
+                self.cell += 1
+            if self.cell >= MINE_CHUNK_SIZE:
+                self._advance()
+        return items
+
+    def ore_pool(self) -> list[Item]:
+        """Ores left in the current chunk"""
+        cells = self.chunk(self.level, self.x)
+        return [ORE_POOL[index]() for index in cells[self.cell:] if index != EMPTY]
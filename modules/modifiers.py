@@ -0,0 +1,119 @@
+ADDITIVE = "add"
+MULTIPLICATIVE = "mul"
+
+
+class Modifier:
+    """Change of a stat coming from a deal, event or upgrade
+
+    Effective value of a stat is (base + sum of additive) * product of multiplicative.
+    Expiring modifiers are removed by an ExpireModifierEffect in the scheduler.
+    """
+    __slots__ = ("stat", "kind", "value", "source")
+
+    def __init__(self, stat: str, kind: str, value: float, source: str):
+        if kind not in (ADDITIVE, MULTIPLICATIVE):
+            raise ValueError(f"Unknown modifier kind: {kind}")
+
+        self.stat = stat
+        self.kind = kind
+        self.value = value
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"Modifier({self.stat} {self.kind} {self.value} from {self.source})"
+
+    def to_dict(self) -> dict:
+        return {"stat": self.stat, "kind": self.kind, "value": self.value, "source": self.source}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Modifier":
+        return cls(data["stat"], data["kind"], data["value"], data["source"])
+
+
+class StatModifiers:
+    """Modifiers grouped by stat, with a cached (additive, multiplier) pair per stat
+
+    A stat's cache is dropped only when its own modifier set changes, so reading
+    an effective value is one dict lookup and no walk over modifiers.
+    """
+    __slots__ = ("_modifiers", "_cache", "version")
+
+    def __init__(self):
+        self._modifiers: dict[str, list[Modifier]] = {}
+        self._cache: dict[str, tuple[float, float]] = {}
+        self.version = 0
+
+    def _changed(self, stat: str):
+        self._cache.pop(stat, None)
+        self.version += 1
+
+    def add(self, modifier: Modifier):
+        """Attach a modifier. Modifiers of the same stat, kind and source stack into one"""
+        modifiers = self._modifiers.setdefault(modifier.stat, [])
+        for existing in modifiers:
+            if existing.kind == modifier.kind and existing.source == modifier.source:
+                if modifier.kind == ADDITIVE:
+                    existing.value += modifier.value
+                else:
+                    existing.value *= modifier.value
+                break
+        else:
+            modifiers.append(Modifier(modifier.stat, modifier.kind, modifier.value, modifier.source))
+
+        self._changed(modifier.stat)
+
+    def remove(self, source: str | None = None, stat: str | None = None) -> int:
+        """Remove modifiers by source and/or stat, returns number of removed modifiers"""
+        removed = 0
+        for name in ([stat] if stat else list(self._modifiers)):
+            modifiers = self._modifiers.get(name, [])
+            kept = [modifier for modifier in modifiers if source is not None and modifier.source != source]
+            if len(kept) != len(modifiers):
+                removed += len(modifiers) - len(kept)
+                self._modifiers[name] = kept
+                self._changed(name)
+        return removed
+
+    def _aggregate(self, stat: str) -> tuple[float, float]:
+        aggregate = self._cache.get(stat)
+        if aggregate is None:
+            additive, multiplier = 0.0, 1.0
+            for modifier in self._modifiers.get(stat, ()):
+                if modifier.kind == ADDITIVE:
+                    additive += modifier.value
+                else:
+                    multiplier *= modifier.value
+            aggregate = self._cache[stat] = (additive, multiplier)
+        return aggregate
+
+    def effective(self, stat: str, base: float) -> float:
+        """Value of a stat with all its modifiers applied"""
+        if stat not in self._modifiers:
+            return base
+        additive, multiplier = self._aggregate(stat)
+        return (base + additive) * multiplier
+
+    def stats(self, prefix: str = "") -> list[str]:
+        """Stats that have modifiers, optionally only those starting with prefix"""
+        return [stat for stat, modifiers in self._modifiers.items() if modifiers and stat.startswith(prefix)]
+
+    def get(self, stat: str) -> list[Modifier]:
+        return list(self._modifiers.get(stat, ()))
+
+    def copy(self) -> "StatModifiers":
+        copy = StatModifiers()
+        copy._modifiers = {stat: [Modifier(m.stat, m.kind, m.value, m.source) for m in modifiers]
+                           for stat, modifiers in self._modifiers.items()}
+        copy._cache = dict(self._cache)
+        copy.version = self.version
+        return copy
+
+    def to_list(self) -> list[dict]:
+        return [modifier.to_dict() for modifiers in self._modifiers.values() for modifier in modifiers]
+
+    @classmethod
+    def from_list(cls, entries: list[dict]) -> "StatModifiers":
+        stat_modifiers = cls()
+        for entry in entries:
+            stat_modifiers.add(Modifier.from_dict(entry))
+        return stat_modifiers
@@ -0,0 +1,133 @@
+import heapq
+import itertools
+
+from config import LUCKY_EVENT_LUCK_VALUE
+from modules.events import LuckyEvent
+
+
+class ScheduledEffect:
+    """Base class for effects fired by EffectScheduler
+
+    Effects are stored in saves, so everything they need must be in to_dict().
+    """
+    def to_dict(self) -> dict:
+        return {"type": self.__class__.__name__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScheduledEffect":
+        return cls()
+
+    def fire(self, state, state_service, ui, event_manager) -> None:
+        """Apply the effect once it is due"""
+        pass
+
+
+class LuckyEventEffect(ScheduledEffect):
+    """Lucky event after a dig, as long as the player still has the luck for it"""
+
+    def fire(self, state, state_service, ui, event_manager) -> None:
+        if state.additional_luck >= LUCKY_EVENT_LUCK_VALUE:
+            event_manager.trigger_specific_event(LuckyEvent, state, state_service, ui)
+
+
+class TimedEventEffect(ScheduledEffect):
+    """Random event check on the wall clock, repeats every interval seconds"""
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def to_dict(self) -> dict:
+        return {"type": self.__class__.__name__, "interval": self.interval}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimedEventEffect":
+        return cls(data["interval"])
+
+    def fire(self, state, state_service, ui, event_manager) -> None:
+        if state.event_defence_counter <= 0:
+            event_manager.trigger_random_event(state, state_service, ui, cause="timer")
+        state_service.schedule_after_seconds(self.interval, self)
+
+
+class ExpireModifierEffect(ScheduledEffect):
+    """Removes an expiring stat modifier"""
+    def __init__(self, source: str):
+        self.source = source
+
+    def to_dict(self) -> dict:
+        return {"type": self.__class__.__name__, "source": self.source}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExpireModifierEffect":
+        return cls(data["source"])
+
+    def fire(self, state, state_service, ui, event_manager) -> None:
+        state_service.remove_modifiers(source=self.source)
+
+
+EFFECT_REGISTRY = {
+    "LuckyEventEffect": LuckyEventEffect,
+    "TimedEventEffect": TimedEventEffect,
+    "ExpireModifierEffect": ExpireModifierEffect,
+}
+
+
+class EffectScheduler:
+    """Heaps of pending effects, one ordered by due dig and one by due time
+
+    Scheduling and popping an effect are O(log n), checking for due effects is O(1).
+    """
+    def __init__(self):
+        self._by_dig: list[tuple[int, int, ScheduledEffect]] = []
+        self._by_time: list[tuple[float, int, ScheduledEffect]] = []
+        # Keeps insertion order for equal due values, effects are never compared
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._by_dig) + len(self._by_time)
+
+    def at_dig(self, dig: int, effect: ScheduledEffect):
+        heapq.heappush(self._by_dig, (dig, next(self._counter), effect))
+
+    def at_time(self, timestamp: float, effect: ScheduledEffect):
+        heapq.heappush(self._by_time, (timestamp, next(self._counter), effect))
+
+    def pop_due(self, dig: int, now: float) -> list[ScheduledEffect]:
+        """Remove and return every effect due at the given dig or time"""
+        due = []
+        while self._by_dig and self._by_dig[0][0] <= dig:
+            due.append(heapq.heappop(self._by_dig)[2])
+        while self._by_time and self._by_time[0][0] <= now:
+            due.append(heapq.heappop(self._by_time)[2])
+        return due
+
+    def pending(self, effect_type: type) -> bool:
+        return any(isinstance(entry[2], effect_type) for entry in self._by_dig + self._by_time)
+
+    def copy(self) -> "EffectScheduler":
+        copy = EffectScheduler()
+        copy._by_dig = list(self._by_dig)
+        copy._by_time = list(self._by_time)
+        copy._counter = itertools.count(next(self._counter))
+        return copy
+
+    def to_list(self) -> list[dict]:
+        """Serialize for saves, in due order so effects due together keep their order on load"""
+        return ([{"dig": dig, **effect.to_dict()} for dig, _, effect in sorted(self._by_dig)]
+                + [{"time": due, **effect.to_dict()} for due, _, effect in sorted(self._by_time)])
+
+    @classmethod
+    def from_list(cls, entries: list[dict]) -> "EffectScheduler":
+        scheduler = cls()
+        for entry in entries:
+            effect_class = EFFECT_REGISTRY.get(entry["type"])
+            if effect_class is None:
+                continue
+            effect = effect_class.from_dict(entry)
+            if "dig" in entry:
+                scheduler._by_dig.append((entry["dig"], next(scheduler._counter), effect))
+            else:
+                scheduler._by_time.append((entry["time"], next(scheduler._counter), effect))
+
+        heapq.heapify(scheduler._by_dig)
+        heapq.heapify(scheduler._by_time)
+        return scheduler
@@ -0,0 +1,599 @@
+import time
+import random
+import json
+import os
+import re
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from array import array
+
+from modules.items import ITEM_REGISTRY, Item
+from modules.catalog import CATALOG
+from modules.leaderboard import Leaderboard
+from modules.scheduler import EffectScheduler, ScheduledEffect, ExpireModifierEffect
+from modules.modifiers import StatModifiers, Modifier
+from modules.mine import Mine
+from modules.market import OreMarket
+from modules.storage import FileLock, SaveConflictError, atomic_write, read_json
+from config import INITIAL_ITEM_CAPACITY, INITIAL_MINING_TIME, INITIAL_MONEY, INITIAL_INVENTORY
+
+logger = logging.getLogger(__name__)
+
+# Profile name of a save that no longer parses as a whole
+_SAVE_NAME = re.compile(r'"name"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+class Saves:
+    """Class for load & save data to json
+
+    Every write bumps the "version" key. A write only goes through if the file
+    on disk still has the (profile, version) this object last read or wrote,
+    otherwise another process saved in between and SaveConflictError is raised.
+    A broken save is replaced by the latest backup of its own profile.
+    """
+    def __init__(self, path: str | None = "save.json", backups: "BackupStore | None" = None):
+        """
+        :param path: save file, None keeps default data in memory only
+        :param backups: store to recover a corrupted save from
+        """
+        self.path = path
+        # Called with the written JSON after every save, e.g. BackupWorker.submit
+        self.on_save = None
+        data = None
+        if self.path is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                pass
+            except json.JSONDecodeError as e:
+                from modules.backup import BackupStore
+                data = self._recover(backups or BackupStore(), e)
+
+        if data is None:
+            self.__data = self.defaults()
+            self._base = None
+            self.save()
+        else:
+            self.__data = data
+            self._base = self._stamp(data)
+            # Older saves lack keys added in later versions
+            for key, value in self.defaults().items():
+                self.__data.setdefault(key, value)
+
+    @staticmethod
+    def _profile_of(path: str) -> str | None:
+        """Profile name read from a corrupted save, None if it can't be told"""
+        with open(path, 'r', errors="replace") as f:
+            match = _SAVE_NAME.search(f.read())
+        if match is None:
+            return None
+        try:
+            return json.loads(match[1])
+        except json.JSONDecodeError:
+            return None
+
+    def _recover(self, backups: "BackupStore", error: json.JSONDecodeError) -> dict | None:
+        """Move a corrupted save aside and put the latest backup of its profile in place
+
+        Backups of every profile share one store, so nothing is restored when
+        the broken file doesn't name its profile.
+        """
+        broken = f"{self.path}.broken-{int(time.time())}"
+        os.replace(self.path, broken)
+        logger.error(f"Save {self.path} is corrupted ({error}), moved to {broken}")
+
+        profile = self._profile_of(broken)
+        if not profile:
+            if profile is None and backups.profiles():
+                logger.warning(f"Profile of {broken} is unknown, not restoring a backup. "
+                               "Restore one with: python -m modules.backup restore <profile>")
+            return None
+        data = backups.restore(profile)
+        if data is None:
+            return None
+        logger.warning(f"Restored {data.get('name')!r} from backup version {data.get('version')}")
+        with FileLock(self.path):
+            atomic_write(self.path, json.dumps(data))
+        return data
+
+    @staticmethod
+    def defaults() -> dict:
+        return {
+            "name": "", 
+            "money": INITIAL_MONEY, 
+            "inventory": list(INITIAL_INVENTORY), 
+            "itemcapacity": INITIAL_ITEM_CAPACITY, 
+            "miningtime": INITIAL_MINING_TIME,
+            "eventdefencecounter": 0,
+            "additional_luck": 0,
+            "lifetime_earnings": 0,
+            "rarest_ore": "",
+            "auto_miner": False,
+            "digs": 0,
+            "scheduled": [],
+            "modifiers": [],
+            "mine_seed": 0,
+            "mine_position": [0, 0, 0],
+            "version": 0
+        }
+
+    @staticmethod
+    def _stamp(data: dict) -> tuple[str, int]:
+        return data.get("name", ""), data.get("version", 0)
+
+    def __getitem__(self, key):
+        return self.__data.get(key, f"[WARNING] {key} not found")
+
+    def __setitem__(self, key, value):
+        if key not in self.__data:
+            raise KeyError
+        self.__data[key] = value
+        self.save()
+
+    def stage(self, data: dict):
+        """Update data in memory only, the next save writes it"""
+        for key in data:
+            if key in self.__data:
+                self.__data[key] = data[key]
+
+    def update_all(self, data: dict):
+        """Update all data at once"""
+        self.stage(data)
+        self.save()
+
+    @property
+    def persistent(self) -> bool:
+        return self.path is not None
+
+    @property
+    def version(self) -> int:
+        return self.__data["version"]
+
+    def detached(self) -> "Saves":
+        """In-memory copy of the data that never touches the disk"""
+        copy = Saves.__new__(Saves)
+        copy.path = None
+        copy.on_save = None
+        copy.__data = dict(self.__data)
+        copy._base = self._base
+        return copy
+
+    def save(self):
+        if not self.persistent:
+            return
+
+        with FileLock(self.path):
+            current = read_json(self.path)
+            found = self._stamp(current) if current is not None else None
+            if found != self._base:
+                raise SaveConflictError(self.path, self._base, found)
+
+            self.__data["version"] = self.version + 1
+            text = json.dumps(self.__data)
+            atomic_write(self.path, text)
+            self._base = self._stamp(self.__data)
+
+        if self.on_save:
+            self.on_save(text)
+
+
+class GameState:
+    """Class for store a game state"""
+    # No per-instance __dict__, many states can be alive at once in simulations
+    __slots__ = ("saves", "_inventory", "_inventory_names", "_inventory_shared", "item_amounts", "money", "_item_capacity",
+                 "_mining_time", "ore_pool", "_auto_save_counter", "_event_defence_until",
+                 "_additional_luck", "lifetime_earnings", "rarest_ore", "auto_miner", "digs",
+                 "scheduler", "modifiers", "mine", "rng")
+    
+    def __init__(self, saves: Saves):
+        self.saves = saves if saves else Saves()
+
+        # Items are built on first access
+        self.inventory = None
+        self._inventory_names: list[str] = self.saves["inventory"]
+        self.item_amounts: array = array('H')
+        self.money: int = self.saves["money"]
+        self.item_capacity: int = self.saves["itemcapacity"]
+        self._mining_time: float = self.saves["miningtime"]
+        self.ore_pool: list[Item] = []
+        self._auto_save_counter = 0
+        self.digs: int = self.saves["digs"]
+        self._event_defence_until: int = self.digs + self.saves["eventdefencecounter"]
+        self._additional_luck: float | int = self.saves["additional_luck"]
+        self.lifetime_earnings: int = self.saves["lifetime_earnings"]
+        self.rarest_ore: str = self.saves["rarest_ore"]
+        self.auto_miner: bool = self.saves["auto_miner"]
+        self.scheduler = EffectScheduler.from_list(self.saves["scheduled"])
+        self.modifiers = StatModifiers.from_list(self.saves["modifiers"])
+        self.mine: Mine | None = None
+        # Random stream of digs and events, a simulation gives every game its own random.Random
+        self.rng: random.Random = random
+
+    def fork(self) -> "GameState":
+        """Cheap copy for what-if evaluation
+
+        Scalars are copied, the inventory is shared until one side changes it,
+        and the fork gets detached saves, so nothing it does reaches the disk.
+        Ore pool and item amounts are shared as they don't change after loot init.
+        Not locked, fork through GameStateService.fork while other threads play.
+        """
+        fork = GameState.__new__(GameState)
+        for slot in GameState.__slots__:
+            setattr(fork, slot, getattr(self, slot))
+
+        fork.saves = self.saves.detached()
+        fork.scheduler = self.scheduler.copy()
+        fork.modifiers = self.modifiers.copy()
+        # The mine is shared world data, forks dig from the ore pool instead
+        fork.mine = None
+        fork._inventory_shared = self._inventory_shared = True
+        return fork
+
+    def snapshot(self) -> "GameState":
+        """Fork meant to be read, not played"""
+        return self.fork()
+
+    @property
+    def inventory(self) -> list[Item]:
+        if self._inventory is None:
+            self._inventory = [ITEM_REGISTRY[name]() for name in self._inventory_names]
+        return self._inventory
+
+    @inventory.setter
+    def inventory(self, items: list[Item]):
+        self._inventory = items
+        self._inventory_shared = False
+
+    def own_inventory(self) -> list[Item]:
+        """Inventory list safe to modify in place, copied first if shared with a fork"""
+        if self._inventory_shared:
+            self.inventory = list(self.inventory)
+        return self.inventory
+
+    def inventory_names(self) -> list[str]:
+        if self._inventory is None:
+            return list(self._inventory_names)
+        return [item.__class__.__name__ for item in self._inventory]
+
+    # Stats below read as effective values (base with modifiers), setters change the base
+
+    @property
+    def mining_time(self) -> float:
+        """Get mining time with minimum bound"""
+        return max(0.1, self.modifiers.effective("mining_time", self._mining_time))
+    
+    @mining_time.setter
+    def mining_time(self, value: float):
+        """Set mining time with validation"""
+        self._mining_time = max(0.1, value)
+
+    @property
+    def base_mining_time(self) -> float:
+        return self._mining_time
+
+    @property
+    def item_capacity(self) -> int:
+        return max(1, round(self.modifiers.effective("capacity", self._item_capacity)))
+
+    @item_capacity.setter
+    def item_capacity(self, value: int):
+        self._item_capacity = max(1, value)
+
+    @property
+    def base_item_capacity(self) -> int:
+        return self._item_capacity
+
+    @property
+    def event_defence_counter(self) -> int:
+        """Digs left with event defence, expires by dig count without any writes"""
+        return max(0, self._event_defence_until - self.digs)
+    
+    @event_defence_counter.setter
+    def event_defence_counter(self, value: int):
+        self._event_defence_until = self.digs + max(0, value)
+
+    @property
+    def additional_luck(self) -> float:
+        return max(0, self.modifiers.effective("luck", self._additional_luck))
+    
+    @additional_luck.setter
+    def additional_luck(self, value: float | int):
+        self._additional_luck = max(0, value)
+
+    @property
+    def base_additional_luck(self) -> float:
+        return self._additional_luck
+
+
+def locked(method):
+    """Run a GameStateService method while holding the state lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class GameStateService:
+    """Service class for game state operations"""
+    def __init__(self, state: GameState, leaderboard: Leaderboard | None = None,
+                 market: OreMarket | None = None):
+        self.state = state
+        self.leaderboard = leaderboard
+        self.market = market if market is not None else OreMarket(None)
+        self._saves_deferred = False
+        self._save_pending = False
+        # Shared with the auto-miner thread, reentrant so locked methods can call each other
+        self.lock = threading.RLock()
+
+    @locked
+    def fork(self) -> "GameStateService":
+        """Service over a forked state, for previews and simulations
+
+        Taken under the lock, so the auto-miner can't change the state halfway through the copy.
+        """
+        return GameStateService(self.state.fork(), market=self.market.copy())
+
+    def _update_leaderboard(self):
+        """Push current stats into the leaderboard indexes"""
+        if self.leaderboard is None:
+            return
+
+        self.leaderboard.update(
+            self.state.saves["name"],
+            money=self.state.money,
+            lifetime_earnings=self.state.lifetime_earnings,
+            rarest_ore=self.state.rarest_ore,
+            mining_time=self.state.mining_time
+        )
+
+    @contextmanager
+    def deferred_saves(self):
+        """Collect every save inside the block into one write at its end"""
+        self._saves_deferred = True
+        try:
+            yield
+        finally:
+            self._saves_deferred = False
+            if self._save_pending:
+                self._save_pending = False
+                self.save_state()
+            self.market.save()
+
+    @locked
+    def save_state(self):
+        """Save current game state to file"""
+        if not self.state.saves.persistent:
+            return
+        if self._saves_deferred:
+            self._save_pending = True
+            return
+
+        data = {
+            "name": self.state.saves["name"],
+            "money": self.state.money,
+            "inventory": self.state.inventory_names(),
+            "itemcapacity": self.state.base_item_capacity,
+            "miningtime": self.state.base_mining_time,
+            "eventdefencecounter": self.state.event_defence_counter,
+            "additional_luck": self.state.base_additional_luck,
+            "lifetime_earnings": self.state.lifetime_earnings,
+            "rarest_ore": self.state.rarest_ore,
+            "auto_miner": self.state.auto_miner,
+            "digs": self.state.digs,
+            "scheduled": self.state.scheduler.to_list(),
+            "modifiers": self.state.modifiers.to_list(),
+            "mine_position": self.state.mine.position if self.state.mine else self.state.saves["mine_position"]
+        }
+        self.state.saves.update_all(data) 
+        self._update_leaderboard()
+        logger.info("Game state saved")
+
+    @locked
+    def clear_inventory(self):
+        """Clear the inventory"""
+        self.state.inventory = []
+        self.save_state()
+        logger.info("Inventory cleared")
+    
+    @locked
+    def sell_inventory(self) -> int:
+        """Sell the whole inventory on the market, returns money paid"""
+        total = self.market.sell(self.state.inventory)
+        self.add_money(total)
+        self.clear_inventory()
+        if not self._saves_deferred:
+            self.market.save()
+        logger.info(f"Sold inventory for ${total}")
+        return total
+
+    @locked
+    def add_item_to_inventory(self, item: Item) -> bool:
+        """Add item to inventory if capacity allows"""
+        if len(self.state.inventory) < self.state.item_capacity:
+            self.state.own_inventory().append(item)
+            if not self.state.rarest_ore or item.chance < CATALOG.chance(self.state.rarest_ore):
+                self.state.rarest_ore = item.name
+            self.save_state()
+            logger.info(f"Added {item.name} to inventory")
+            return True
+        logger.warning("Failed to add item: Inventory full")
+        return False
+    
+
+    @locked
+    def add_money(self, amount: int) -> int:
+        """Add money with auto-save every 5 transactions"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        self.state.money += amount
+        self.state.lifetime_earnings += amount
+        self.state._auto_save_counter += 1
+        if self.state._auto_save_counter >= 5:
+            self.save_state()
+            self.state._auto_save_counter = 0
+        else:
+            self._update_leaderboard()
+        
+        logger.info(f"Added ${amount}, new balance: ${self.state.money}")
+        return self.state.money
+
+    @locked
+    def deduct_money(self, amount: int) -> int:
+        """Deduct money if sufficient funds exist"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        if self.state.money >= amount:
+            self.state.money -= amount
+            self.save_state()
+            logger.info(f"Deducted ${amount}, new balance: ${self.state.money}")
+            return self.state.money
+        
+        return self.state.money
+    
+    @locked
+    def increase_mining_speed(self, amount: float) -> float:
+        """Increase mining speed (decrease mining time)"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        self.state.mining_time = self.state.base_mining_time - amount
+        self.save_state()
+        logger.info(f"Mining time increased, new time: {self.state.mining_time}")
+        return self.state.mining_time
+
+    @locked
+    def decrease_mining_speed(self, amount: float) -> float:
+        """Decrease mining speed (increase mining time)"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        self.state.mining_time = self.state.base_mining_time + amount
+        self.save_state()
+        logger.info(f"Mining time decreased, new time: {self.state.mining_time}")
+        return self.state.mining_time
+        
+
+    @locked
+    def increase_item_capacity(self, amount: int = 1) -> int:
+        """Increase item capacity"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        self.state.item_capacity = self.state.base_item_capacity + amount
+        self.save_state()
+        logger.info(f"Item capacity increased, new capacity: {self.state.item_capacity}")
+
+        return self.state.item_capacity
+
+    @locked
+    def decrease_item_capacity(self, amount: int = 1) -> int:
+        """Decrease item capacity"""
+        if amount < 0:
+            raise ValueError("Amount must be non-negative")
+
+        self.state.item_capacity = self.state.base_item_capacity - amount
+        self.save_state()
+        logger.info(f"Item capacity decreased, new capacity: {self.state.item_capacity}")
+
+        return self.state.item_capacity
+
+    @locked
+    def increase_luck(self, value: float):
+        self.state.additional_luck = self.state.base_additional_luck + value
+        self.save_state()
+        logger.info(f"Additional luck increased to {value}")
+        return self.state.additional_luck
+
+    @locked
+    def reset_luck(self):
+        self.state.additional_luck = 0
+        self.state.modifiers.remove(stat="luck")
+        self.save_state()
+        logger.info(f"Additional luck zeroed")
+
+        return self.state.additional_luck
+
+    @locked
+    def add_event_defence(self, duration: int = 10) -> int:
+        """Add event defence for a number of minings"""
+        if duration < 0:
+            raise ValueError("Duration must be non-negative")
+        
+        self.state.event_defence_counter += duration
+        self.save_state()
+        
+        logger.info(f"Defent from event effect added for {duration} minings")
+        return self.state.event_defence_counter
+
+    @locked
+    def set_name(self, name: str):
+        """Register the player under a name"""
+        self.state.saves.stage({"name": name})
+        self.save_state()
+        logger.info(f"Player {name} registered")
+
+    @locked
+    def hire_miner(self) -> bool:
+        """Hire a background auto-miner"""
+        if self.state.auto_miner:
+            return False
+
+        self.state.auto_miner = True
+        self.save_state()
+        logger.info("Auto-miner hired")
+        return True
+
+    @locked
+    def add_modifier(self, modifier: Modifier, digs: int | None = None):
+        """Attach a stat modifier, expiring after that many digs if given"""
+        if digs is not None:
+            # Unique source, so the expiry removes exactly this modifier
+            modifier.source = f"{modifier.source}@{self.state.digs + digs}"
+            self.state.scheduler.at_dig(self.state.digs + digs, ExpireModifierEffect(modifier.source))
+
+        self.state.modifiers.add(modifier)
+        self.save_state()
+        logger.info(f"Added {modifier}")
+
+    @locked
+    def remove_modifiers(self, source: str | None = None, stat: str | None = None) -> int:
+        """Remove stat modifiers by source and/or stat"""
+        removed = self.state.modifiers.remove(source, stat)
+        if removed:
+            self.save_state()
+            logger.info(f"Removed {removed} modifiers of {source or stat}")
+        return removed
+
+    @locked
+    def register_dig(self) -> int:
+        """Count a finished dig. Not saved right away, dig-timed effects only compare against it"""
+        self.state.digs += 1
+        return self.state.digs
+
+    @locked
+    def schedule_after_digs(self, digs: int, effect: ScheduledEffect):
+        """Schedule an effect to fire once the player made that many more digs"""
+        self.state.scheduler.at_dig(self.state.digs + digs, effect)
+        self.save_state()
+        logger.info(f"Scheduled {effect.__class__.__name__} in {digs} digs")
+
+    @locked
+    def schedule_after_seconds(self, seconds: float, effect: ScheduledEffect):
+        """Schedule an effect to fire after that many seconds of wall-clock time"""
+        self.state.scheduler.at_time(time.time() + seconds, effect)
+        self.save_state()
+        logger.info(f"Scheduled {effect.__class__.__name__} in {seconds} seconds")
+
+    @locked
+    def pop_due_effects(self, by_time: bool = True) -> list[ScheduledEffect]:
+        """Take every scheduled effect that is due now, by_time=False leaves wall-clock effects scheduled"""
+        due = self.state.scheduler.pop_due(self.state.digs, time.time() if by_time else float("-inf"))
+        if due:
+            self.save_state()
+        return due
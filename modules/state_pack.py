@@ -0,0 +1,216 @@
+import struct
+
+from modules.items import ITEM_REGISTRY
+from modules.catalog import CATALOG
+from modules.modifiers import StatModifiers
+from modules.scheduler import EffectScheduler
+
+
+# (field, struct format) of one packed row, inventory is stored as one count per ore type.
+# Money is packed in whole dollars.
+STATE_FIELDS = [
+    ("money", "q"),
+    ("item_capacity", "I"),
+    ("_mining_time", "d"),
+    ("digs", "I"),
+    ("_event_defence_until", "I"),
+    ("_additional_luck", "d"),
+    ("lifetime_earnings", "q"),
+    ("rarest_ore", "H"),
+    ("auto_miner", "?"),
+] + [(f"ore:{name}", "H") for name in CATALOG.ore_names]
+NO_ORE = 0xFFFF  # rarest_ore of a state that found nothing yet
+
+ORE_NAMES = list(CATALOG.ore_names)
+ROW_FORMAT = "<" + "".join(fmt for _, fmt in STATE_FIELDS)
+ROW_SIZE = struct.calcsize(ROW_FORMAT)
+POPULATION_MAGIC = b"PYMS"
+
+
+def _field_offsets() -> dict[str, tuple[int, struct.Struct]]:
+    offsets, position = {}, 0
+    for name, fmt in STATE_FIELDS:
+        field = struct.Struct("<" + fmt)
+        offsets[name] = (position, field)
+        position += field.size
+    return offsets
+
+FIELD_OFFSETS = _field_offsets()
+
+
+def _field(name: str):
+    """Property reading and writing a single field of the row"""
+    position, field = FIELD_OFFSETS[name]
+
+    def getter(self):
+        return field.unpack_from(self._buffer, self._offset + position)[0]
+
+    def setter(self, value):
+        field.pack_into(self._buffer, self._offset + position, value)
+
+    return property(getter, setter)
+
+
+class StateRow:
+    """View of one game state stored in a StatePopulation buffer
+
+    Keeps the same validation as GameState properties, but all data lives in
+    the shared buffer.
+    """
+    __slots__ = ("_buffer", "_offset")
+
+    def __init__(self, buffer: bytearray, index: int):
+        self._buffer = buffer
+        self._offset = index * ROW_SIZE
+
+    money = _field("money")
+    item_capacity = _field("item_capacity")
+    lifetime_earnings = _field("lifetime_earnings")
+    auto_miner = _field("auto_miner")
+    digs = _field("digs")
+    _mining_time = _field("_mining_time")
+    _event_defence_until = _field("_event_defence_until")
+    _additional_luck = _field("_additional_luck")
+    _rarest_ore = _field("rarest_ore")
+
+    @property
+    def mining_time(self) -> float:
+        return max(0.1, self._mining_time)
+
+    @mining_time.setter
+    def mining_time(self, value: float):
+        self._mining_time = max(0.1, value)
+
+    @property
+    def event_defence_counter(self) -> int:
+        """Digs left with event defence, like GameState it expires by dig count"""
+        return max(0, self._event_defence_until - self.digs)
+
+    @event_defence_counter.setter
+    def event_defence_counter(self, value: int):
+        self._event_defence_until = self.digs + max(0, value)
+
+    @property
+    def additional_luck(self) -> float:
+        return self._additional_luck
+
+    @additional_luck.setter
+    def additional_luck(self, value: float | int):
+        self._additional_luck = max(0, value)
+
+    @property
+    def rarest_ore(self) -> str:
+        index = self._rarest_ore
+        return ORE_NAMES[index] if index != NO_ORE else ""
+
+    @rarest_ore.setter
+    def rarest_ore(self, name: str):
+        self._rarest_ore = CATALOG.ore_index[name] if name else NO_ORE
+
+    def inventory_counts(self) -> dict[str, int]:
+        counts = {}
+        for name in ORE_NAMES:
+            position, field = FIELD_OFFSETS["ore:" + name]
+            count = field.unpack_from(self._buffer, self._offset + position)[0]
+            if count:
+                counts[name] = count
+        return counts
+
+    def set_inventory(self, items: list):
+        counts = dict.fromkeys(ORE_NAMES, 0)
+        for item in items:
+            counts[item.__class__.__name__] += 1
+        for name, count in counts.items():
+            position, field = FIELD_OFFSETS["ore:" + name]
+            field.pack_into(self._buffer, self._offset + position, count)
+
+    def inventory(self) -> list:
+        """Materialize inventory items"""
+        return [ITEM_REGISTRY[name]() for name, count in self.inventory_counts().items()
+                for _ in range(count)]
+
+    def store(self, state):
+        """Copy base stats of a GameState into this row
+
+        Rows have a fixed size and no room for modifiers or scheduled effects,
+        a state that has any raises ValueError instead of losing them.
+        """
+        if state.modifiers.stats() or len(state.scheduler):
+            raise ValueError("States with modifiers or scheduled effects can't be packed")
+        self.money = round(state.money)
+        self.item_capacity = state.base_item_capacity
+        self.mining_time = state.base_mining_time
+        self.digs = state.digs
+        self.event_defence_counter = state.event_defence_counter
+        self.additional_luck = state.base_additional_luck
+        self.lifetime_earnings = round(state.lifetime_earnings)
+        self.rarest_ore = state.rarest_ore
+        self.auto_miner = state.auto_miner
+        self.set_inventory(state.inventory)
+
+    def restore(self, state):
+        """Copy this row into a GameState, which is left without modifiers and scheduled effects"""
+        state.money = self.money
+        state.item_capacity = self.item_capacity
+        state.mining_time = self.mining_time
+        state.digs = self.digs
+        state.event_defence_counter = self.event_defence_counter
+        state.additional_luck = self.additional_luck
+        state.lifetime_earnings = self.lifetime_earnings
+        state.rarest_ore = self.rarest_ore
+        state.auto_miner = self.auto_miner
+        state.inventory = self.inventory()
+        state.modifiers = StatModifiers()
+        state.scheduler = EffectScheduler()
+
+
+class StatePopulation:
+    """Many game states packed into one contiguous buffer of fixed-size rows"""
+    def __init__(self, buffer: bytearray | None = None):
+        self._buffer = buffer if buffer is not None else bytearray()
+
+    def __len__(self):
+        return len(self._buffer) // ROW_SIZE
+
+    def __getitem__(self, index: int) -> StateRow:
+        if not 0 <= index < len(self):
+            raise IndexError("state index out of range")
+        return StateRow(self._buffer, index)
+
+    def __iter__(self):
+        return (StateRow(self._buffer, index) for index in range(len(self)))
+
+    def new_row(self) -> StateRow:
+        self._buffer.extend(bytes(ROW_SIZE))
+        row = StateRow(self._buffer, len(self) - 1)
+        row.rarest_ore = ""
+        return row
+
+    def append(self, state) -> int:
+        """Pack a GameState into a new row, returns its index"""
+        try:
+            self.new_row().store(state)
+        except ValueError:
+            del self._buffer[-ROW_SIZE:]
+            raise
+        return len(self) - 1
+
+    def dump(self, path: str):
+        """Write the whole population as one buffer"""
+        header = ",".join(ORE_NAMES).encode()
+        with open(path, 'wb') as f:
+            f.write(POPULATION_MAGIC)
+            f.write(struct.pack("<II", len(header), ROW_SIZE))
+            f.write(header)
+            f.write(self._buffer)
+
+    @classmethod
+    def load(cls, path: str) -> "StatePopulation":
+        with open(path, 'rb') as f:
+            if f.read(4) != POPULATION_MAGIC:
+                raise ValueError(f"{path} is not a state population file")
+            header_size, row_size = struct.unpack("<II", f.read(8))
+            ore_names = f.read(header_size).decode().split(",")
+            if row_size != ROW_SIZE or ore_names != ORE_NAMES:
+                raise ValueError(f"{path} was written with a different ore set")
+            return cls(bytearray(f.read()))
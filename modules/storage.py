@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SaveConflictError(Exception):
+    """Save file was changed by another process since it was last read"""
+    def __init__(self, path: str, expected: tuple, found: tuple):
+        super().__init__(f"{path}: expected {expected}, found {found}")
+        self.path = path
+        self.expected = expected
+        self.found = found
+
+
+class FileLock:
+    """Advisory exclusive lock held on a side file (<path>.lock) across processes
+
+    Only writers take the lock, readers rely on atomic_write never leaving a
+    partially written file behind.
+    """
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self._fd: int | None = None
+
+    def __enter__(self) -> "FileLock":
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            # LK_LOCK gives up after 10 seconds, keep waiting like flock does
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+
+def atomic_write(path: str, content: str | bytes):
+    """Write a file through a temporary file and rename, readers see the old or the new file"""
+    import tempfile  # not needed before the first write, keeps it off the startup path
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Windows refuses to replace a file another process has open, readers close it quickly
+        for attempt in range(50):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == 49:
+                    raise
+                time.sleep(0.01)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_json(path: str, default=None):
+    """Lock-free read of a file written by atomic_write"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def read_save(path: str = "save.json") -> tuple[str, int, dict] | None:
+    """Snapshot of a save for status tools: (profile, version, data), None if there is no save
+
+    Never blocks a running game, the version tells whether two reads saw the same write.
+    """
+    data = read_json(path)
+    if data is None:
+        return None
+    return data.get("name", ""), data.get("version", 0), data
@@ -0,0 +1,403 @@
+import logging
+import math
+import os
+import random
+from multiprocessing import Pool
+
+from config import (ORE_POOL_SIZE, ITEM_DROP_RANGE, TIMED_EVENT_INTERVAL, TOURNAMENT_WORLDS,
+                    TOURNAMENT_MINUTES, TOURNAMENT_BATCH)
+from modules.items import ORE_POOL
+from modules.mine import Mine
+from modules.market import OreMarket
+from modules.state import Saves, GameState, GameStateService
+from modules.events import EventManager, EventWithChoice, HelpStrangerEvent, EquipmentFailureEvent
+
+logger = logging.getLogger(__name__)
+
+Z_95 = 1.96  # normal quantile of two-sided 95% confidence intervals
+
+
+class SilentUI:
+    """UI of simulated games: prints nothing, waits for nothing, event choices come from the strategy"""
+    def __init__(self, strategy: "Strategy", state):
+        self.strategy = strategy
+        self.state = state
+        # Event being triggered, set by the simulation before it asks for a choice
+        self.event = None
+
+    def clear(self):
+        pass
+
+    def print_message(self, message: str):
+        pass
+
+    def notify(self, message: str):
+        pass
+
+    def slowprint(self, text: str, delay: float = 0) -> bool:
+        return False
+
+    def pause(self, seconds: float) -> bool:
+        return False
+
+    def input_choice(self, prompt: str = "choice: ") -> str:
+        if isinstance(self.event, EventWithChoice):
+            return self.strategy.choose(self.state, self.event)
+        return ""
+
+    def wait_for_input(self, prompt: str = ""):
+        pass
+
+
+class Player:
+    """What a strategy can do between digs, the same purchases the menus make"""
+    def __init__(self, state, state_service, upgrades, deals: dict):
+        """
+        :param state: GameState
+        :param state_service: GameStateService
+        :param upgrades: UpgradesAction
+        :param deals: shop deals by key
+        """
+        self.state = state
+        self.state_service = state_service
+        self.upgrades = upgrades
+        self.deals = deals
+        self._deal_keys = {type(deal).__name__: key for key, deal in deals.items()}
+
+    @property
+    def inventory_full(self) -> bool:
+        return len(self.state.inventory) >= self.state.item_capacity
+
+    def sell(self) -> int:
+        return self.state_service.sell_inventory() if self.state.inventory else 0
+
+    def upgrade_speed(self) -> bool:
+        return self.upgrades.buy_speed(self.state, self.state_service)
+
+    def upgrade_capacity(self) -> bool:
+        return self.upgrades.buy_capacity(self.state, self.state_service)
+
+    def buy(self, deal: str) -> bool:
+        """Buy a deal by shop key or class name, False if it can't be bought"""
+        return self.deals[self._deal_keys.get(deal, deal)].buy(self.state_service)
+
+
+class Strategy:
+    """Policy of a simulated player
+
+    act() runs before every dig and may sell and buy through the Player,
+    choose() answers choice events. Strategies are sent to worker processes,
+    so they must be picklable (defined at module level).
+    """
+    name = "sell-only"
+
+    def act(self, player: Player):
+        if player.inventory_full:
+            player.sell()
+
+    def choose(self, state, event: EventWithChoice) -> str:
+        """Key of the choice to take, by default the last one ("walk away")"""
+        return list(event.available_choices)[-1]
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class CapacityFirst(Strategy):
+    """Buys capacity while money allows, speed with what is left"""
+    name = "capacity-first"
+
+    def act(self, player: Player):
+        super().act(player)
+        while player.upgrade_capacity():
+            pass
+        while player.upgrade_speed():
+            pass
+
+
+class SpeedFirst(Strategy):
+    """Buys speed while money allows, capacity with what is left"""
+    name = "speed-first"
+
+    def act(self, player: Player):
+        super().act(player)
+        while player.upgrade_speed():
+            pass
+        while player.upgrade_capacity():
+            pass
+
+
+class Cheapest(Strategy):
+    """Always buys the cheaper of the two upgrades"""
+    name = "cheapest"
+
+    def act(self, player: Player):
+        super().act(player)
+        state = player.state
+        while True:
+            if player.upgrades.speed_cost(state) <= player.upgrades.capacity_cost(state):
+                bought = player.upgrade_speed()
+            else:
+                bought = player.upgrade_capacity()
+            if not bought:
+                break
+
+
+class GodBlessFirst(CapacityFirst):
+    """Buys GodBlessDeal whenever affordable, upgrades capacity-first otherwise"""
+    name = "god-bless"
+
+    def act(self, player: Player):
+        Strategy.act(self, player)
+        player.buy("GodBlessDeal")
+        super().act(player)
+
+
+class HelpStranger(CapacityFirst):
+    """Capacity-first player who always helps the stranger"""
+    name = "help-stranger"
+    help_choice = "1"  # "Help them" in the catalog
+
+    def choose(self, state, event: EventWithChoice) -> str:
+        if isinstance(event, HelpStrangerEvent):
+            return self.help_choice
+        return super().choose(state, event)
+
+
+STRATEGIES = {strategy.name: strategy for strategy in
+              (Strategy, CapacityFirst, SpeedFirst, Cheapest, GodBlessFirst, HelpStranger)}
+
+
+class GameResult:
+    """Outcome of one strategy in one world
+
+    income_rate is money earned per simulated minute, ruined tells whether
+    an event ever left the player unable to continue (see Simulation).
+    """
+    __slots__ = ("income_rate", "ruined", "money", "digs")
+
+    def __init__(self, income_rate: float, ruined: bool, money: int, digs: int):
+        self.income_rate = income_rate
+        self.ruined = ruined
+        self.money = money
+        self.digs = digs
+
+
+class Simulation:
+    """One game of a strategy in a seeded world, on a simulated clock
+
+    A dig takes the current mining time, random events follow digs and every
+    TIMED_EVENT_INTERVAL simulated seconds, like in the game. The world seed
+    sets the mine, the loot and the random stream, so strategies playing the
+    same world see the same ores and draw the same random numbers for as long
+    as their choices allow (common random numbers). The hired miner only digs
+    while the player is in menus, so it is not simulated.
+
+    A player is ruined when they can't continue the game: their equipment
+    broke and not even selling the inventory would pay the repair. A balance
+    that only touches 0, e.g. after buying upgrades, is not a ruin.
+    """
+    def __init__(self, strategy: Strategy, world_seed: int):
+        from modules.actions import MiningAction, UpgradesAction, ShopAction
+
+        # Own random stream, games in one process don't share or reseed the global one
+        self.rng = random.Random(world_seed)
+        self.strategy = strategy
+        self.clock = 0.0
+        self.state = GameState(Saves(None))
+        self.state.rng = self.rng
+        for _ in range(ORE_POOL_SIZE):
+            self.state.ore_pool.append(self.rng.choice(ORE_POOL)())
+            self.state.item_amounts.append(self.rng.randint(*ITEM_DROP_RANGE))
+        self.state.mine = Mine(world_seed)
+
+        self.state_service = GameStateService(self.state, market=OreMarket(None, clock=lambda: self.clock))
+        self.event_manager = EventManager(logger, self.rng)
+        self.ui = SilentUI(strategy, self.state)
+        self.player = Player(self.state, self.state_service, UpgradesAction(), ShopAction().deals)
+        self.dig = MiningAction.dig
+        self.ruined = False
+
+    def _event(self, event_class):
+        """Trigger an event, equipment left broken ruins the player"""
+        event = event_class(self.state, self.state_service, self.ui)
+        self.ui.event = event
+        event.trigger()
+        self.ui.event = None
+        if isinstance(event, EquipmentFailureEvent) and not event.repaired:
+            wealth = self.state.money + self.state_service.market.value(self.state.inventory)
+            if wealth < event.min_repair_cost:
+                self.ruined = True
+
+    def _random_event(self):
+        if self.state.event_defence_counter <= 0 and self.event_manager.should_trigger():
+            self._event(self.event_manager.get_random_event(self.state.modifiers))
+
+    def _fire_due_effects(self):
+        # Only dig-timed effects are ever scheduled here, timed events run on the simulated clock.
+        # They fire lucky events and expire modifiers, neither can ruin the player
+        for effect in self.state_service.pop_due_effects():
+            effect.fire(self.state, self.state_service, self.ui, self.event_manager)
+
+    def run(self, minutes: float) -> GameResult:
+        state = self.state
+        duration = minutes * 60
+        next_timed_event = TIMED_EVENT_INTERVAL
+        while self.clock < duration:
+            self.strategy.act(self.player)
+            if self.player.inventory_full:
+                self.player.sell()
+
+            self.clock += state.mining_time
+            self.dig(state, self.state_service)
+            self.state_service.register_dig()
+            self._fire_due_effects()
+            self._random_event()
+
+            if self.clock >= next_timed_event:
+                next_timed_event += TIMED_EVENT_INTERVAL
+                self._random_event()
+
+        self.player.sell()
+        return GameResult(state.lifetime_earnings / minutes, self.ruined, state.money, state.digs)
+
+
+def _play_batch(task: tuple) -> tuple[int, list[tuple[int, GameResult]]]:
+    """Worker: play one strategy in a batch of worlds"""
+    strategy_index, strategy, worlds, minutes = task
+    # Simulated games log thousands of digs, nobody reads them
+    previous = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        return strategy_index, [(index, Simulation(strategy, seed).run(minutes)) for index, seed in worlds]
+    finally:
+        logging.disable(previous)
+
+
+def mean_interval(values: list[float]) -> tuple[float, float]:
+    """Mean and half-width of its 95% confidence interval"""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, math.inf
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    return mean, Z_95 * math.sqrt(variance / n)
+
+
+def wilson_interval(successes: int, n: int) -> tuple[float, float]:
+    """95% Wilson score interval of a probability, sound near 0 and 1 unlike the normal one"""
+    p = successes / n
+    denominator = 1 + Z_95 ** 2 / n
+    center = (p + Z_95 ** 2 / (2 * n)) / denominator
+    half = Z_95 * math.sqrt(p * (1 - p) / n + Z_95 ** 2 / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class StrategyStats:
+    """Statistics of one strategy over all worlds"""
+    def __init__(self, strategy: Strategy, results: list[GameResult]):
+        self.strategy = strategy
+        self.results = results
+        self.income_rate = mean_interval([result.income_rate for result in results])
+        self.ruins = sum(result.ruined for result in results)
+        self.ruin_probability = self.ruins / len(results)
+        self.ruin_interval = wilson_interval(self.ruins, len(results))
+        # Paired difference of income rate to the best strategy, set by TournamentReport
+        self.behind_best: tuple[float, float] | None = None
+
+
+class TournamentReport:
+    """Per-strategy statistics, best income rate first
+
+    Every strategy played the same worlds, so differences are compared per
+    world (paired), which cancels out most of the luck of the worlds.
+    """
+    def __init__(self, strategies: list[Strategy], results: list[list[GameResult]], minutes: float):
+        self.minutes = minutes
+        self.worlds = len(results[0]) if results else 0
+        self.stats = sorted((StrategyStats(strategy, games) for strategy, games in zip(strategies, results)),
+                            key=lambda stats: stats.income_rate[0], reverse=True)
+        if self.stats:
+            best = self.stats[0]
+            for stats in self.stats[1:]:
+                stats.behind_best = mean_interval([ours.income_rate - theirs.income_rate
+                                                   for ours, theirs in zip(stats.results, best.results)])
+
+    @property
+    def dominant(self) -> Strategy | None:
+        """Best strategy if it earns significantly more than every other one"""
+        if len(self.stats) < 2:
+            return None
+        if all(mean + half < 0 for mean, half in (stats.behind_best for stats in self.stats[1:])):
+            return self.stats[0].strategy
+        return None
+
+    def summary(self) -> str:
+        lines = [f"{self.worlds} worlds, {self.minutes:g} minutes each, 95% confidence intervals",
+                 f"{'strategy':<16} {'income/min':>18} {'vs best':>20} {'ruin':>22} {'digs':>7}"]
+        for stats in self.stats:
+            mean, half = stats.income_rate
+            behind = "best" if stats.behind_best is None else f"{stats.behind_best[0]:+.2f} ± {stats.behind_best[1]:.2f}"
+            low, high = stats.ruin_interval
+            ruin = f"{stats.ruin_probability:.1%} [{low:.1%}, {high:.1%}]"
+            digs = sum(result.digs for result in stats.results) / len(stats.results)
+            lines.append(f"{stats.strategy.name:<16} {f'{mean:.2f} ± {half:.2f}':>18} {behind:>20} {ruin:>22} {digs:>7.0f}")
+
+        dominant = self.dominant
+        lines.append(f"dominant: {dominant.name}" if dominant else "dominant: none")
+        return "\n".join(lines)
+
+
+def run_tournament(strategies: list[Strategy], worlds: int = TOURNAMENT_WORLDS,
+                   minutes: float = TOURNAMENT_MINUTES, seed: int = 0,
+                   processes: int | None = None) -> TournamentReport:
+    """Play every strategy in the same seeded worlds, in batches across processes
+
+    :param strategies: policies to compare
+    :param worlds: number of worlds every strategy plays
+    :param minutes: simulated play time per game
+    :param seed: seed of the world seeds, the same seed replays the same tournament
+    :param processes: worker processes, all cores by default, 1 plays in this process
+    """
+    rng = random.Random(seed)
+    world_seeds = [(index, rng.getrandbits(31) or 1) for index in range(worlds)]
+    tasks = [(strategy_index, strategy, world_seeds[start:start + TOURNAMENT_BATCH], minutes)
+             for strategy_index, strategy in enumerate(strategies)
+             for start in range(0, worlds, TOURNAMENT_BATCH)]
+
+    results: list[list[GameResult | None]] = [[None] * worlds for _ in strategies]
+
+    def collect(batches):
+        for strategy_index, games in batches:
+            for world_index, result in games:
+                results[strategy_index][world_index] = result
+
+    if processes == 1:
+        collect(map(_play_batch, tasks))
+    else:
+        with Pool(processes or os.cpu_count()) as pool:
+            collect(pool.imap_unordered(_play_batch, tasks))
+    return TournamentReport(strategies, results, minutes)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m modules.tournament",
+                                     description="Compare player strategies over the same seeded worlds")
+    parser.add_argument("strategies", nargs="*", metavar="STRATEGY",
+                        help=f"strategies to play, all by default: {', '.join(STRATEGIES)}")
+    parser.add_argument("--worlds", type=int, default=TOURNAMENT_WORLDS, help="worlds per strategy")
+    parser.add_argument("--minutes", type=float, default=TOURNAMENT_MINUTES, help="simulated minutes per game")
+    parser.add_argument("--seed", type=int, default=0, help="tournament seed")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, all cores by default")
+    args = parser.parse_args(argv)
+    for name in args.strategies:
+        if name not in STRATEGIES:
+            parser.error(f"unknown strategy {name!r}, choose from {', '.join(STRATEGIES)}")
+
+    strategies = [STRATEGIES[name]() for name in args.strategies or STRATEGIES]
+    print(run_tournament(strategies, args.worlds, args.minutes, args.seed, args.processes).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import io
+import os
+
+import pytest
+
+from modules.animation import KeyListener, Typewriter
+
+
+class Recorder:
+    """Output stream keeping every write and counting flushes"""
+    def __init__(self):
+        self.writes = []
+        self.flushes = 0
+
+    def write(self, text: str):
+        self.writes.append(text)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class PipeTTY:
+    """Read end of a pipe that claims to be a terminal, lines are typed by writing to the other end"""
+    def __init__(self):
+        read_fd, self._write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd)
+
+    def isatty(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._reader.fileno()
+
+    def readline(self) -> str:
+        return self._reader.readline()
+
+    def type(self, line: str):
+        os.write(self._write_fd, (line + "\n").encode())
+
+    def close(self):
+        self._reader.close()
+        os.close(self._write_fd)
+
+
+def test_characters_of_a_frame_go_out_in_one_write():
+    output = Recorder()
+    typewriter = Typewriter(KeyListener(io.StringIO()), output, frame=0.01)
+
+    assert typewriter.type("abcdefghij", 0.0025) is False
+    assert output.writes == ["abcd", "efgh", "ij"]
+    assert output.flushes == 3
+
+
+def test_no_delay_writes_the_text_at_once():
+    output = Recorder()
+    Typewriter(KeyListener(io.StringIO()), output).type("abcdefghij", 0)
+    assert output.writes == ["abcdefghij"]
+
+
+def test_pending_line_skips_the_rest_and_is_read_by_input(capsys):
+    keys = KeyListener(io.StringIO())
+    keys.pending = "2"
+    output = Recorder()
+
+    assert Typewriter(keys, output, frame=0.01).type("abcdefghij", 0.0025) is True
+    assert output.writes == ["abcd", "efghij"]
+
+    assert keys.input("> ") == "2"
+    assert keys.pending is None
+    assert capsys.readouterr().out == "> 2\n"
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="console keys are read through msvcrt")
+def test_line_typed_during_animation_is_carried_over():
+    stream = PipeTTY()
+    try:
+        keys = KeyListener(stream)
+        output = Recorder()
+        stream.type("sell")
+
+        assert Typewriter(keys, output, frame=0.01).type("abcdefghij", 0.0025) is True
+        assert "".join(output.writes) == "abcdefghij"
+        assert keys.pending == "sell"
+        # Further waits return at once until the line is read
+        assert keys.wait(10) is True
+    finally:
+        stream.close()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="console keys are read through msvcrt")
+def test_empty_line_skips_without_carrying_over():
+    stream = PipeTTY()
+    try:
+        keys = KeyListener(stream)
+        stream.type("")
+
+        assert keys.wait(10) is True
+        assert keys.pending is None
+        assert keys.wait(0.01) is False
+    finally:
+        stream.close()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from modules.auto_miner import AutoMiner
+from modules.state import GameState, GameStateService, Saves
+from modules.storage import SaveConflictError
+
+
+class Digger:
+    """Dig callable that counts calls and can be waited on"""
+    def __init__(self, error: Exception | None = None):
+        self.calls = 0
+        self.error = error
+        self.dug = threading.Event()
+
+    def __call__(self, state, state_service) -> list:
+        self.calls += 1
+        self.dug.set()
+        if self.error:
+            raise self.error
+        return []
+
+
+def miner() -> AutoMiner:
+    state = GameState(Saves(None))
+    state.mining_time = 0.1  # fastest miner, a dig every 0.2 seconds
+    return AutoMiner(state, GameStateService(state))
+
+
+def test_started_miner_digs_until_stopped():
+    auto_miner, dig = miner(), Digger()
+    auto_miner.start(dig)
+    assert auto_miner.running
+    assert dig.dug.wait(2)
+
+    auto_miner.stop()
+    assert not auto_miner.running
+    stopped_at = dig.calls
+    assert auto_miner.digs == stopped_at
+    time.sleep(0.3)
+    assert dig.calls == stopped_at
+
+
+def test_paused_miner_waits_for_resume():
+    auto_miner, dig = miner(), Digger()
+    auto_miner.start(dig)
+    auto_miner.pause()
+    assert auto_miner.paused
+    # A dig that already passed the pause check may still finish
+    time.sleep(0.3)
+    paused_at = dig.calls
+    dig.dug.clear()
+
+    assert not dig.dug.wait(0.5)
+    assert dig.calls == paused_at
+
+    auto_miner.resume()
+    assert dig.dug.wait(2)
+    auto_miner.stop()
+
+
+def test_stop_wakes_a_paused_miner():
+    auto_miner = miner()
+    auto_miner.start(Digger())
+    auto_miner.pause()
+    auto_miner.stop()
+    assert not auto_miner.running
+
+
+def test_error_stops_the_miner_and_is_kept_for_the_menu():
+    auto_miner, dig = miner(), Digger(OSError("disk full"))
+    auto_miner.start(dig)
+    assert dig.dug.wait(2)
+    auto_miner._thread.join(2)
+
+    assert not auto_miner.running
+    assert isinstance(auto_miner.error, OSError)
+    assert auto_miner.conflict is None
+    assert auto_miner.digs == 0
+
+    # Starting again, e.g. in a new session, clears the error
+    auto_miner.start(Digger())
+    assert auto_miner.error is None
+    auto_miner.stop()
+
+
+def test_save_conflict_is_handed_to_the_game():
+    conflict = SaveConflictError("save.json", ("ann", 1), ("ann", 2))
+    auto_miner, dig = miner(), Digger(conflict)
+    auto_miner.start(dig)
+    assert dig.dug.wait(2)
+    auto_miner._thread.join(2)
+
+    assert auto_miner.conflict is conflict
+    assert auto_miner.error is None
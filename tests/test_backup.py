@@ -0,0 +1,84 @@
+import os
+
+import modules.backup
+from modules.backup import BackupStore, BackupWorker
+
+
+def save(money: int, version: int, name: str = "ann") -> dict:
+    return {"name": name, "money": money, "inventory": ["Coal"] * money, "version": version}
+
+
+def test_restore_replays_deltas_of_every_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(modules.backup, "BACKUP_CHECKPOINT_EVERY", 4)
+    store = BackupStore(str(tmp_path))
+    for version in range(10):
+        store.backup(save(version, version))
+
+    versions = store.versions("ann")
+    assert [entry["full"] for entry in versions] == [True, False, False, False] * 2 + [True, False]
+    for position in range(10):
+        assert store.restore("ann", position) == save(position, position)
+
+
+def test_restore_does_not_depend_on_the_store_in_memory(tmp_path):
+    BackupStore(str(tmp_path)).backup(save(1, 1))
+    BackupStore(str(tmp_path)).backup(save(2, 2))
+
+    assert BackupStore(str(tmp_path)).restore("ann") == save(2, 2)
+
+
+def test_version_bump_alone_is_not_backed_up(tmp_path):
+    store = BackupStore(str(tmp_path))
+    assert store.backup(save(1, 1)) is not None
+    assert store.backup(save(1, 2)) is None
+    assert len(store.versions("ann")) == 1
+
+
+def test_unnamed_profile_is_not_backed_up(tmp_path):
+    store = BackupStore(str(tmp_path))
+    assert store.backup(save(1, 1, name="")) is None
+    assert store.profiles() == []
+
+
+def test_retention_drops_whole_segments_and_their_objects(tmp_path, monkeypatch):
+    monkeypatch.setattr(modules.backup, "BACKUP_CHECKPOINT_EVERY", 3)
+    monkeypatch.setattr(modules.backup, "BACKUP_RETENTION", 5)
+    store = BackupStore(str(tmp_path))
+    for version in range(12):
+        store.backup(save(version, version))
+
+    versions = store.versions("ann")
+    assert versions[0]["full"]
+    assert 5 <= len(versions) < 5 + 3
+    assert [entry["version"] for entry in versions] == list(range(12 - len(versions), 12))
+    objects = os.listdir(os.path.join(store._profile_dir("ann"), "objects"))
+    assert len(objects) == len(versions)
+    assert store.restore("ann", 0) == save(versions[0]["version"], versions[0]["version"])
+
+
+def test_latest_restores_most_recent_profile(tmp_path):
+    store = BackupStore(str(tmp_path))
+    store.backup(save(1, 1, name="ann"), now=100)
+    store.backup(save(2, 1, name="bob"), now=200)
+
+    assert store.profiles() == ["bob", "ann"]
+    assert store.restore_latest()["name"] == "bob"
+
+
+def test_worker_backs_up_newest_snapshot_on_stop(tmp_path):
+    store = BackupStore(str(tmp_path))
+    worker = BackupWorker(store, interval=3600)
+    worker.submit('{"name": "ann", "money": 1, "version": 1}')
+    worker.submit('{"name": "ann", "money": 2, "version": 2}')
+    worker.stop()
+
+    assert store.restore("ann")["money"] == 2
+
+
+def test_worker_backs_up_right_away_after_stop(tmp_path):
+    store = BackupStore(str(tmp_path))
+    worker = BackupWorker(store, interval=3600)
+    worker.stop()
+
+    worker.submit('{"name": "ann", "money": 3, "version": 3}')
+    assert store.restore("ann")["money"] == 3
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from modules.actions import MiningAction, ShopAction, UpgradesAction
+from modules.batch import UNTIL_BROKE, BatchRunner, BatchScriptError, parse_script
+from modules.items import ITEM_REGISTRY
+from modules.scheduler import LuckyEventEffect, TimedEventEffect
+from modules.state import GameState, GameStateService, Saves
+
+
+def test_parse_counts_targets_and_comments():
+    commands = parse_script("mine x3; SELL ALL  # empty the bag\n"
+                            "upgrade Speed until broke\n"
+                            "buy 1 x2;;name Ann Lee")
+
+    assert [(c.verb, c.target, c.count) for c in commands] == [
+        ("mine", None, 3), ("sell", None, 1), ("upgrade", "speed", UNTIL_BROKE),
+        ("buy", "1", 2), ("name", "Ann Lee", 1)]
+
+
+@pytest.mark.parametrize("script", ["dig", "mine 3", "upgrade luck", "sell x2 now", "name"])
+def test_parse_rejects_unknown_commands(script):
+    with pytest.raises(BatchScriptError, match="line 2"):
+        parse_script("mine\n" + script)
+
+
+def make_runner(tmp_path, money: int = 0):
+    saves = Saves(str(tmp_path / "save.json"))
+    state = GameState(saves)
+    state.money = money
+    service = GameStateService(state)
+    return BatchRunner(state, service, MiningAction.dig, ShopAction().deals, UpgradesAction()), service
+
+
+def run(runner, service, script: str):
+    with service.deferred_saves():
+        return runner.run(parse_script(script))
+
+
+def test_name_is_written_with_the_single_deferred_save(tmp_path):
+    runner, service = make_runner(tmp_path, money=1000)
+    version = runner.state.saves.version
+
+    run(runner, service, "name ann; upgrade capacity x2")
+
+    with open(tmp_path / "save.json") as f:
+        data = json.load(f)
+    assert data["name"] == "ann"
+    assert data["version"] == version + 1
+
+
+def test_mine_stops_at_capacity_and_reports_it(tmp_path):
+    runner, service = make_runner(tmp_path)
+    state = runner.state
+    state.inventory = [ITEM_REGISTRY["Coal"]()] * state.item_capacity
+
+    report = run(runner, service, "mine x4")
+
+    assert (report.digs, report.full_digs) == (0, 4)
+    assert "skipped: 4 digs with a full inventory" in report.summary()
+
+
+def test_due_effects_wait_on_their_own_schedule(tmp_path):
+    runner, service = make_runner(tmp_path)
+    state = runner.state
+    state.ore_pool.append(ITEM_REGISTRY["Coal"]())
+    state.item_amounts.append(1)
+    service.schedule_after_seconds(-1, TimedEventEffect(60))
+    service.schedule_after_digs(1, LuckyEventEffect())
+
+    run(runner, service, "mine")
+
+    assert [type(effect) for _, _, effect in state.scheduler._by_time] == [TimedEventEffect]
+    assert [type(effect) for _, _, effect in state.scheduler._by_dig] == [LuckyEventEffect]
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from modules import events
+from modules.catalog import Catalog, load_catalog
+
+
+def content(price: int) -> dict:
+    return {"ores": [{"name": "Coal", "price": price, "chance": 0.5}]}
+
+
+def write(path, data: dict, mtime_ns: int):
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_compiled_catalog_is_reused_until_the_content_changes(tmp_path):
+    path = tmp_path / "catalog.json"
+    write(path, content(10), 10 ** 18)
+    assert load_catalog(str(path)).price("Coal") == 10
+    assert (tmp_path / "catalog.pickle").exists()
+
+    # Same size and mtime: the cache is trusted, even though the content differs
+    write(path, content(20), 10 ** 18)
+    assert load_catalog(str(path)).price("Coal") == 10
+
+    # Same size, new mtime
+    write(path, content(30), 2 * 10 ** 18)
+    assert load_catalog(str(path)).price("Coal") == 30
+
+    # New size, the old mtime
+    write(path, content(400), 2 * 10 ** 18)
+    assert load_catalog(str(path)).price("Coal") == 400
+
+
+def test_unreadable_cache_is_recompiled(tmp_path):
+    path = tmp_path / "catalog.json"
+    write(path, content(10), 10 ** 18)
+    (tmp_path / "catalog.pickle").write_bytes(b"not a pickle")
+
+    assert load_catalog(str(path)).price("Coal") == 10
+
+
+@pytest.fixture
+def catalog_events(monkeypatch):
+    catalog = Catalog({"events": [
+        {"name": "CaveInEvent", "weight": 1, "description": "Rocks fall.", "conseq": "Slower for {duration} digs.",
+         "behaviour": "TraumaEvent"},
+        {"name": "EchoEvent", "weight": 1, "description": "An echo.", "conseq": "Nothing."},
+        {"name": "TraumaEvent", "weight": 1, "description": "Ouch.", "conseq": "Slower."},
+    ]})
+    monkeypatch.setattr(events, "CATALOG", catalog)
+    monkeypatch.setattr(events, "_event_classes", {})
+
+
+def test_event_reusing_a_behaviour_is_a_subclass_named_after_it(catalog_events):
+    cave_in = events.event_class("CaveInEvent")
+    assert issubclass(cave_in, events.TraumaEvent) and cave_in is not events.TraumaEvent
+    assert cave_in.__name__ == "CaveInEvent"
+    assert events.event_class("CaveInEvent") is cave_in
+
+    # Texts come from the event's own entry, the behaviour formats them
+    event = cave_in(None, None, None)
+    assert event.description == "Rocks fall."
+    assert "{duration}" not in event.conseq
+
+
+def test_event_without_behaviour_is_a_plain_event(catalog_events):
+    echo = events.event_class("EchoEvent")
+    assert echo.__bases__ == (events.Event,)
+    assert echo(None, None, None).description == "An echo."
+
+
+def test_built_in_events_keep_their_class(catalog_events):
+    assert events.event_class("TraumaEvent") is events.TraumaEvent
@@ -0,0 +1,81 @@
+import logging
+from itertools import product
+
+from config import EARNINGS_BUCKETS
+from modules.earnings import Distribution, EarningsModel
+from modules.events import EventManager
+from modules.items import ITEM_REGISTRY
+from modules.state import GameState, Saves
+
+
+def brute_force_sum(values: list[int], n: int) -> dict[int, float]:
+    pmf = {}
+    for combination in product(values, repeat=n):
+        total = sum(combination)
+        pmf[total] = pmf.get(total, 0) + 1 / len(values) ** n
+    return pmf
+
+
+def test_small_sums_are_exact():
+    values = [2, 5, 15, 30]
+    distribution = Distribution.uniform(values).power(4)
+    expected = brute_force_sum(values, 4)
+    assert distribution.step == 1
+    assert set(distribution.pmf) == set(expected)
+    for value, p in expected.items():
+        assert abs(distribution.pmf[value] - p) < 1e-12
+
+
+def test_wide_sums_stay_bounded_with_exact_moments():
+    ore = Distribution.uniform([2, 5, 15, 30, 75, 100, 150])
+    repair = Distribution.from_pmf({-cost: 1 / 491 for cost in range(10, 501)})
+    dig = Distribution.mixture([(0.8, ore), (0.2, ore + repair)])
+    minute = dig.power(600)
+
+    assert len(minute.probs) <= EARNINGS_BUCKETS + 1
+    assert abs(sum(minute.probs) - 1) < 1e-9
+    assert abs(minute.mean - 600 * dig.mean) < 1e-6
+    assert abs(minute.variance - 600 * dig.variance) < 1e-3
+    # Coarsening moves mass to neighbouring grid points only, the mean stays put
+    assert abs(sum(value * p for value, p in minute.points()) - minute.mean) < 1e-6 * abs(minute.mean)
+
+
+def test_mixture_moments():
+    mixed = Distribution.mixture([(0.5, Distribution.constant(0)), (0.5, Distribution.constant(10))])
+    assert mixed.pmf == {0: 0.5, 10: 0.5}
+    assert mixed.mean == 5
+    assert mixed.variance == 25
+
+
+def rich_state(money: int) -> GameState:
+    state = GameState(Saves(None))
+    for name in ("Stone", "Coal", "Iron", "Gold", "Ruby"):
+        state.ore_pool.append(ITEM_REGISTRY[name]())
+        state.item_amounts.append(2)
+    state.money = money
+    state.mining_time = 0.1
+    state.item_capacity = 50
+    return state
+
+
+def test_losses_of_a_minute_are_capped_by_the_balance():
+    model = EarningsModel(EventManager(logging.getLogger(__name__)))
+    state = rich_state(100_000)
+
+    mean, _ = model.rate(state)
+    minute = model.per_minute(state)
+
+    # Repairs take up to half the balance, about 600 digs a minute leave almost nothing of it
+    assert -100_000 < mean < -80_000
+    assert minute.offset >= -100_000
+    assert minute.mean >= -100_000
+
+
+def test_balance_hardly_matters_when_losses_are_small():
+    model = EarningsModel(EventManager(logging.getLogger(__name__)))
+    state = rich_state(100)
+    state.mining_time = 3
+    state.item_capacity = 2
+
+    mean, _ = model.rate(state)
+    assert abs(mean - model.per_minute(state).mean) < 1e-3 * abs(mean)
@@ -0,0 +1,63 @@
+import threading
+
+from modules.items import ITEM_REGISTRY
+from modules.modifiers import ADDITIVE, Modifier
+from modules.scheduler import LuckyEventEffect
+from modules.state import GameState, GameStateService, Saves
+
+
+def service(tmp_path) -> GameStateService:
+    service = GameStateService(GameState(Saves(str(tmp_path / "save.json"))))
+    service.add_item_to_inventory(ITEM_REGISTRY["Coal"]())
+    service.add_modifier(Modifier("mining_time", ADDITIVE, -0.5, "deal"))
+    return service
+
+
+def play(service: GameStateService):
+    """Change every part of the state a fork copies"""
+    service.add_item_to_inventory(ITEM_REGISTRY["Gold"]())
+    service.add_money(100)
+    service.add_modifier(Modifier("mining_time", ADDITIVE, -0.5, "deal"))
+    service.add_modifier(Modifier("luck", ADDITIVE, 1, "bless"), digs=3)
+    service.schedule_after_digs(2, LuckyEventEffect())
+    service.register_dig()
+    service.save_state()
+
+
+def view(state: GameState) -> tuple:
+    return (state.inventory_names(), state.money, state.digs, state.mining_time,
+            state.additional_luck, state.modifiers.to_list(), state.scheduler.to_list())
+
+
+def test_fork_changes_never_reach_the_parent_or_the_save(tmp_path):
+    parent = service(tmp_path)
+    before = view(parent.state)
+    on_disk = (tmp_path / "save.json").read_text()
+
+    play(parent.fork())
+
+    assert view(parent.state) == before
+    assert (tmp_path / "save.json").read_text() == on_disk
+
+
+def test_parent_changes_never_reach_a_fork(tmp_path):
+    parent = service(tmp_path)
+    fork = parent.fork()
+    before = view(fork.state)
+
+    play(parent)
+
+    assert view(fork.state) == before
+    assert fork.state.saves["money"] == before[1]
+
+
+def test_fork_waits_for_the_state_lock(tmp_path):
+    parent = service(tmp_path)
+    forked = threading.Event()
+
+    with parent.lock:
+        thread = threading.Thread(target=lambda: (parent.fork(), forked.set()))
+        thread.start()
+        assert not forked.wait(0.1)
+    thread.join()
+    assert forked.is_set()
@@ -0,0 +1,53 @@
+import random
+from bisect import insort
+
+from modules.leaderboard import BlockedSortedList, Leaderboard, RankIndex
+
+
+def test_blocked_sorted_list_matches_sorted_list():
+    rng = random.Random(7)
+    blocked = BlockedSortedList(block_size=4)
+    plain = []
+    for _ in range(2000):
+        if plain and rng.random() < 0.4:
+            entry = rng.choice(plain)
+            plain.remove(entry)
+            blocked.remove(entry)
+        else:
+            entry = (rng.random(), f"p{rng.randrange(10 ** 6)}")
+            if entry in plain:
+                continue
+            insort(plain, entry)
+            blocked.add(entry)
+
+        assert len(blocked) == len(plain)
+    assert blocked.head(len(plain) + 1) == plain
+    for position, entry in enumerate(plain):
+        assert blocked.index(entry) == position
+
+
+def test_rank_index_moves_profiles():
+    index = RankIndex()
+    for profile, money in [("a", 10), ("b", 30), ("c", 20)]:
+        index.update(profile, money)
+    assert index.top(2) == ["b", "c"]
+    assert index.update("a", 40)
+    assert not index.update("a", 40)
+    assert index.top() == ["a", "b", "c"]
+    assert index.rank("c") == 3
+    index.remove("b")
+    assert index.rank("c") == 2
+    assert index.rank("b") is None
+
+
+def test_leaderboard_save_merges_other_sessions(tmp_path):
+    path = str(tmp_path / "leaderboard.json")
+    first, second = Leaderboard(path), Leaderboard(path)
+    first.update("ann", money=5)
+    second.update("bob", money=9)
+    first.save()
+    second.save()
+
+    board = Leaderboard(path)
+    assert board.top("money") == [("bob", 9), ("ann", 5)]
+    assert board.rank("money", "ann") == 2
@@ -0,0 +1,108 @@
+import gzip
+import os
+import shutil
+
+from modules.log_analyzer import LogAnalyzer
+
+SESSION = [
+    "2026-01-01 10:00:00,000 - INFO - Player ann logged in",
+    "2026-01-01 10:00:01,000 - INFO - Added Gold to inventory",
+    "2026-01-01 10:00:01,001 - INFO - Dug 1 ores",
+]
+MORE = [
+    "2026-01-01 10:05:00,000 - INFO - Added Coal to inventory",
+    "2026-01-01 10:05:00,001 - INFO - Dug 1 ores",
+]
+NEXT_SESSION = [
+    "2026-01-02 09:00:00,000 - INFO - Player bob logged in",
+    "2026-01-02 09:00:01,000 - INFO - Dug 1 ores",
+]
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode) as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+def run(tmp_path):
+    analyzer = LogAnalyzer(str(tmp_path / "checkpoint"))
+    analyzer.process(LogAnalyzer.discover(str(tmp_path / "game.log")))
+    analyzer.save_checkpoint()
+    return analyzer.summary()
+
+
+def test_appended_lines_are_parsed_once(tmp_path):
+    write(tmp_path / "game.log", SESSION)
+    run(tmp_path)
+    write(tmp_path / "game.log", MORE, "a")
+    summary = run(tmp_path)
+    assert summary["digs"] == 2
+    assert summary["ores"] == {"Gold": 1, "Coal": 1}
+    assert summary["sessions"] == 1
+
+
+def test_renamed_log_keeps_its_offset(tmp_path):
+    log = tmp_path / "game.log"
+    write(log, SESSION)
+    run(tmp_path)
+
+    # Lines written after the last run, then the log is rotated by rename
+    write(log, MORE, "a")
+    os.rename(log, tmp_path / "game.log.1")
+    write(log, NEXT_SESSION)
+    summary = run(tmp_path)
+
+    assert summary["digs"] == 3
+    assert summary["ores"] == {"Gold": 1, "Coal": 1}
+    assert summary["sessions"] == 2
+
+
+def test_copied_and_compressed_logs_keep_their_offset(tmp_path):
+    log = tmp_path / "game.log"
+    write(log, SESSION)
+    run(tmp_path)
+
+    # Copy-and-truncate rotation, then compression of the copy
+    write(log, MORE, "a")
+    shutil.copy(log, tmp_path / "game.log.1")
+    write(log, NEXT_SESSION)
+    summary = run(tmp_path)
+    assert summary["digs"] == 3
+    assert summary["sessions"] == 2
+
+    with open(tmp_path / "game.log.1", "rb") as src, gzip.open(tmp_path / "game.log.2.gz", "wb") as dst:
+        dst.write(src.read())
+    os.remove(tmp_path / "game.log.1")
+    summary = run(tmp_path)
+    assert summary["digs"] == 3
+    assert summary["ores"] == {"Gold": 1, "Coal": 1}
+
+
+def test_expected_drop_rates_follow_catalog_chances(tmp_path):
+    write(tmp_path / "game.log", SESSION)
+    expected = run(tmp_path)["expected_drop_rates"]
+    assert abs(sum(expected.values()) - 1) < 1e-9
+    assert expected["Stone"] > expected["Gold"]
+
+
+def test_every_dig_counts_and_only_dig_checks_give_event_rates(tmp_path):
+    write(tmp_path / "game.log", [
+        "2026-01-01 10:00:00,000 - INFO - Player ann logged in",
+        # Full inventory: the action runs but nothing is dug
+        "2026-01-01 10:00:01,000 - INFO - Dug 0 ores",
+        "2026-01-01 10:00:01,001 - INFO - Executed action 1",
+        "2026-01-01 10:00:01,002 - INFO - No event after dig",
+        # Auto-miner and batch digs never go through the menu
+        "2026-01-01 10:00:02,000 - INFO - Added Coal to inventory",
+        "2026-01-01 10:00:02,001 - INFO - Dug 1 ores",
+        "2026-01-01 10:00:03,000 - INFO - Dug 1 ores",
+        "2026-01-01 10:00:03,001 - INFO - Executed action 1",
+        "2026-01-01 10:00:03,002 - INFO - Random event triggered after dig: LuckyEvent",
+        "2026-01-01 10:00:04,000 - INFO - Random event triggered after timer: LuckyEvent",
+    ])
+    summary = run(tmp_path)
+    assert summary["digs"] == 3
+    assert summary["ores"] == {"Coal": 1}
+    assert summary["event_checks"] == 2
+    assert summary["event_rates"]["LuckyEvent"] == 0.5
+    assert summary["timed_events"] == {"LuckyEvent": 1}
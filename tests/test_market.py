@@ -0,0 +1,95 @@
+import logging
+import math
+
+import pytest
+
+from config import MARKET_DEPTH, MARKET_HALF_LIFE, MARKET_PRICE_FLOOR
+from modules.earnings import EarningsModel
+from modules.events import EventManager
+from modules.items import ITEM_REGISTRY
+from modules.market import OreMarket
+from modules.state import GameState, Saves
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def ores(name: str, count: int) -> list:
+    return [ITEM_REGISTRY[name]() for _ in range(count)]
+
+
+def test_revenue_is_the_integral_of_the_price_curve():
+    market = OreMarket(None, Clock())
+    steps = 10_000
+    slice_ = 30 / steps
+    # Midpoint sum of unit prices over 30 units sold in thin slices
+    expected = sum(market.base_price("Gold") * slice_
+                   * (MARKET_PRICE_FLOOR + (1 - MARKET_PRICE_FLOOR) * math.exp(-(step + 0.5) * slice_ / MARKET_DEPTH))
+                   for step in range(steps))
+    assert market.revenue("Gold", 30) == pytest.approx(expected, rel=1e-6)
+
+
+def test_selling_at_once_pays_the_same_as_one_by_one():
+    clock = Clock()
+    at_once = OreMarket(None, clock).revenue("Iron", 40)
+
+    market = OreMarket(None, clock)
+    one_by_one = 0.0
+    for _ in range(40):
+        one_by_one += market.revenue("Iron", 1)
+        market.sell(ores("Iron", 1))
+
+    assert one_by_one == pytest.approx(at_once)
+
+
+def test_revenue_does_not_sell():
+    market = OreMarket(None, Clock())
+    quote = market.quote("Ruby")
+    market.revenue("Ruby", 10)
+    assert market.quote("Ruby") == quote == market.base_price("Ruby")
+
+
+def test_supply_halves_every_half_life():
+    clock = Clock()
+    market = OreMarket(None, clock)
+    market.sell(ores("Coal", 20))
+
+    clock.now += MARKET_HALF_LIFE
+    assert market.supply("Coal") == pytest.approx(10)
+    assert market.quote("Coal") > OreMarket(None, Clock(0)).quote("Coal") * MARKET_PRICE_FLOOR
+
+
+def test_save_merges_sales_of_sessions(tmp_path):
+    path = str(tmp_path / "market.json")
+    clock = Clock()
+    first = OreMarket(path, clock)
+    second = OreMarket(path, clock)
+    first.sell(ores("Gold", 10))
+    second.sell(ores("Gold", 5))
+    first.save()
+    second.save()
+
+    clock.now += MARKET_HALF_LIFE
+    assert second.supply("Gold") == pytest.approx(7.5)
+    assert OreMarket(path, clock).supply("Gold") == pytest.approx(7.5)
+
+
+def test_earnings_follow_market_prices():
+    state = GameState(Saves(None))
+    for name in ("Gold", "Ruby"):
+        state.ore_pool.append(ITEM_REGISTRY[name]())
+        state.item_amounts.append(2)
+    market = OreMarket(None, Clock())
+    model = EarningsModel(EventManager(logging.getLogger(__name__)), market)
+    fresh, _ = model.rate(state)
+
+    market.sell(ores("Gold", 200) + ores("Ruby", 200))
+    flooded, _ = model.rate(state)
+
+    assert flooded < fresh * 0.5
+    assert model.prices(state) == [round(market.quote("Gold")), round(market.quote("Ruby"))]
@@ -0,0 +1,31 @@
+from modules.mine import EMPTY, Mine
+from config import MINE_CACHE_SIZE, MINE_CHUNK_SIZE
+
+
+def dig_past_cache(mine: Mine):
+    """Mine enough chunks that the first one is evicted"""
+    mine.take(MINE_CHUNK_SIZE * (MINE_CACHE_SIZE + 2))
+
+
+def test_evicted_chunks_stay_mined():
+    mine = Mine(7)
+    dig_past_cache(mine)
+
+    assert all(cell == EMPTY for cell in mine.chunk(0, 0))
+
+
+def test_seed_and_position_restore_the_mine():
+    mine = Mine(7)
+    mine.take(MINE_CHUNK_SIZE // 2)
+    restored = Mine(7, mine.position)
+
+    assert restored.chunk(*mine.position[:2]) == mine.chunk(*mine.position[:2])
+    assert [item.name for item in restored.take(MINE_CHUNK_SIZE)] == \
+        [item.name for item in mine.take(MINE_CHUNK_SIZE)]
+
+
+def test_chunks_ahead_are_untouched():
+    mine = Mine(7)
+    mine.take(MINE_CHUNK_SIZE // 2)
+
+    assert mine.chunk(0, 1) == mine.generate(0, 1)
@@ -0,0 +1,83 @@
+from modules.actions import UpgradesAction
+from modules.modifiers import ADDITIVE, MULTIPLICATIVE, Modifier, StatModifiers
+from modules.state import GameState, GameStateService, Saves
+
+
+def test_change_drops_only_the_cache_of_its_stat():
+    modifiers = StatModifiers()
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "bless"))
+    modifiers.add(Modifier("mining_time", MULTIPLICATIVE, 0.5, "deal"))
+    assert modifiers.effective("luck", 0) == 1
+    assert modifiers.effective("mining_time", 4) == 2
+
+    modifiers.add(Modifier("mining_time", ADDITIVE, -1, "trauma"))
+    assert "luck" in modifiers._cache
+    assert "mining_time" not in modifiers._cache
+    assert modifiers.effective("mining_time", 4) == 1.5
+
+    modifiers.remove(stat="luck")
+    assert "luck" not in modifiers._cache
+    assert modifiers.effective("luck", 0) == 0
+    assert modifiers.effective("mining_time", 4) == 1.5
+
+
+def test_same_source_and_kind_stack_into_one_modifier():
+    modifiers = StatModifiers()
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "bless"))
+    modifiers.add(Modifier("luck", ADDITIVE, 2, "bless"))
+    modifiers.add(Modifier("luck", MULTIPLICATIVE, 2, "bless"))
+    modifiers.add(Modifier("luck", MULTIPLICATIVE, 3, "bless"))
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "stranger"))
+
+    assert [(m.kind, m.value, m.source) for m in modifiers.get("luck")] == [
+        (ADDITIVE, 3, "bless"), (MULTIPLICATIVE, 6, "bless"), (ADDITIVE, 1, "stranger")]
+    assert modifiers.effective("luck", 0) == 24
+
+
+def test_remove_by_stat_or_source():
+    modifiers = StatModifiers()
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "bless"))
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "stranger"))
+    modifiers.add(Modifier("capacity", ADDITIVE, 2, "bless"))
+
+    # No source removes every modifier of the stat
+    assert modifiers.remove(source=None, stat="luck") == 2
+    assert modifiers.stats() == ["capacity"]
+
+    modifiers.add(Modifier("luck", ADDITIVE, 1, "stranger"))
+    assert modifiers.remove(source="bless") == 1
+    assert modifiers.stats() == ["luck"]
+    assert modifiers.remove(source="bless") == 0
+
+
+def test_modifier_expires_after_its_digs():
+    state = GameState(Saves(None))
+    service = GameStateService(state)
+    service.add_modifier(Modifier("luck", ADDITIVE, 2, "bless"), digs=2)
+    assert state.additional_luck == 2
+
+    service.register_dig()
+    assert service.pop_due_effects(by_time=False) == []
+    service.register_dig()
+    for effect in service.pop_due_effects(by_time=False):
+        effect.fire(state, service, None, None)
+
+    assert state.additional_luck == 0
+    assert state.modifiers.stats() == []
+
+
+def test_upgrades_are_priced_from_the_stats_they_change():
+    state = GameState(Saves(None))
+    service = GameStateService(state)
+    speed_cost, capacity_cost = UpgradesAction.speed_cost(state), UpgradesAction.capacity_cost(state)
+
+    service.add_modifier(Modifier("mining_time", MULTIPLICATIVE, 0.5, "deal"))
+    service.add_modifier(Modifier("capacity", ADDITIVE, 3, "deal"))
+    assert UpgradesAction.speed_cost(state) == speed_cost
+    assert UpgradesAction.capacity_cost(state) == capacity_cost
+
+    state.money = speed_cost
+    base = state.base_mining_time
+    assert UpgradesAction.buy_speed(state, service)
+    assert state.base_mining_time < base
+    assert state.mining_time == state.base_mining_time * 0.5
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from modules.backup import BackupStore
+from modules.state import Saves
+from modules.storage import SaveConflictError
+
+
+def test_every_save_bumps_the_version(tmp_path):
+    path = str(tmp_path / "save.json")
+    saves = Saves(path)
+    first = saves.version
+
+    saves["money"] = 10
+    assert saves.version == first + 1
+    with open(path) as f:
+        assert json.load(f)["version"] == saves.version
+
+
+def test_save_over_another_sessions_write_conflicts(tmp_path):
+    path = str(tmp_path / "save.json")
+    ours = Saves(path)
+    theirs = Saves(path)
+
+    theirs["money"] = 10
+    with pytest.raises(SaveConflictError):
+        ours["money"] = 20
+
+    with open(path) as f:
+        assert json.load(f)["money"] == 10
+
+
+def test_reloaded_save_writes_after_another_session(tmp_path):
+    path = str(tmp_path / "save.json")
+    Saves(path)["money"] = 10
+
+    saves = Saves(path)
+    saves["money"] = 20
+    assert Saves(path)["money"] == 20
+
+
+def test_corrupted_save_is_restored_from_backup(tmp_path):
+    path = tmp_path / "save.json"
+    store = BackupStore(str(tmp_path / "backups"))
+    saves = Saves(str(path))
+    saves.on_save = lambda text: store.backup(json.loads(text))
+    saves.update_all({"name": "ann", "money": 42})
+
+    path.write_text('{"name": "ann", "mon')
+    restored = Saves(str(path), store)
+
+    assert restored["money"] == 42
+    assert json.loads(path.read_text())["money"] == 42
+    assert list(tmp_path.glob("save.json.broken-*"))
+
+
+def test_corrupted_save_without_backup_starts_over(tmp_path):
+    path = tmp_path / "save.json"
+    path.write_text("{")
+
+    saves = Saves(str(path), BackupStore(str(tmp_path / "backups")))
+    assert saves["name"] == ""
+    assert saves["money"] == Saves.defaults()["money"]
+
+
+def test_corrupted_save_is_restored_from_its_own_profile(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    store.backup({"name": "ann", "money": 42, "version": 1}, now=100)
+    # Another save backed up later into the same store
+    store.backup({"name": "bob", "money": 7, "version": 1}, now=200)
+
+    path = tmp_path / "save.json"
+    path.write_text('{"name": "ann", "mon')
+    restored = Saves(str(path), store)
+
+    assert restored["name"] == "ann"
+    assert restored["money"] == 42
+
+
+def test_corrupted_save_of_unknown_profile_is_not_restored(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"))
+    store.backup({"name": "ann", "money": 42, "version": 1})
+
+    path = tmp_path / "save.json"
+    path.write_text('{"mon')
+    saves = Saves(str(path), store)
+
+    assert saves["name"] == ""
+    assert saves["money"] == Saves.defaults()["money"]
+    assert list(tmp_path.glob("save.json.broken-*"))
@@ -0,0 +1,53 @@
+import json
+
+from modules.scheduler import EffectScheduler, ExpireModifierEffect, LuckyEventEffect, TimedEventEffect
+from modules.state import GameState, GameStateService, Saves
+
+
+def names(effects: list) -> list:
+    return [effect.source if isinstance(effect, ExpireModifierEffect) else type(effect).__name__
+            for effect in effects]
+
+
+def test_round_trip_keeps_due_order_and_ties():
+    scheduler = EffectScheduler()
+    scheduler.at_dig(5, ExpireModifierEffect("a"))
+    scheduler.at_dig(5, ExpireModifierEffect("b"))
+    # An earlier effect reorders the heap, ties must still pop in insertion order
+    scheduler.at_dig(1, ExpireModifierEffect("first"))
+    scheduler.at_dig(5, ExpireModifierEffect("c"))
+    scheduler.at_time(100.0, TimedEventEffect(30))
+    scheduler.at_time(50.0, LuckyEventEffect())
+
+    loaded = EffectScheduler.from_list(json.loads(json.dumps(scheduler.to_list())))
+    assert len(loaded) == len(scheduler)
+    assert names(loaded.pop_due(5, 0)) == ["first", "a", "b", "c"]
+    assert names(loaded.pop_due(5, 100.0)) == ["LuckyEventEffect", "TimedEventEffect"]
+    assert len(loaded) == 0
+
+
+def test_unknown_effect_types_are_skipped():
+    entries = [{"dig": 3, "type": "RemovedEffect"}, {"dig": 4, "type": "LuckyEventEffect"},
+               {"time": 10.0, "type": "RemovedEffect", "extra": 1}]
+    loaded = EffectScheduler.from_list(entries)
+
+    assert len(loaded) == 1
+    assert names(loaded.pop_due(4, 0)) == ["LuckyEventEffect"]
+
+
+def test_digs_are_saved_only_when_an_effect_comes_due(tmp_path):
+    path = tmp_path / "save.json"
+    state = GameState(Saves(str(path)))
+    service = GameStateService(state)
+    service.schedule_after_digs(2, LuckyEventEffect())
+    on_disk = path.read_text()
+
+    service.register_dig()
+    assert service.pop_due_effects(by_time=False) == []
+    assert path.read_text() == on_disk
+
+    service.register_dig()
+    assert names(service.pop_due_effects(by_time=False)) == ["LuckyEventEffect"]
+    saved = json.loads(path.read_text())
+    assert saved["digs"] == 2
+    assert saved["scheduled"] == []
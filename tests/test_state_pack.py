@@ -0,0 +1,88 @@
+import struct
+import tracemalloc
+
+import pytest
+
+from modules.state import Saves, GameState
+from modules.catalog import CATALOG
+from modules.items import ITEM_REGISTRY
+from modules.modifiers import ADDITIVE, Modifier
+from modules.scheduler import LuckyEventEffect
+from modules.state_pack import StatePopulation, ROW_SIZE
+
+
+def make_state(money: int = 1234) -> GameState:
+    state = GameState(Saves(None))
+    state.money = money
+    state.lifetime_earnings = 10 ** 12
+    state.item_capacity = 7
+    state.mining_time = 1.5
+    state.digs = 40
+    state.event_defence_counter = 3
+    state.additional_luck = 0.25
+    state.rarest_ore = "Ruby"
+    state.auto_miner = True
+    state.inventory = [ITEM_REGISTRY[name]() for name in ("Coal", "Coal", "Gold")]
+    return state
+
+
+def test_row_round_trips_a_state(tmp_path):
+    population = StatePopulation()
+    population.append(make_state())
+    population.dump(str(tmp_path / "states.bin"))
+
+    restored = GameState(Saves(None))
+    StatePopulation.load(str(tmp_path / "states.bin"))[0].restore(restored)
+
+    assert restored.money == 1234 and isinstance(restored.money, int)
+    assert restored.lifetime_earnings == 10 ** 12
+    assert restored.base_item_capacity == 7
+    assert restored.base_mining_time == 1.5
+    assert restored.digs == 40
+    assert restored.event_defence_counter == 3
+    assert restored.base_additional_luck == 0.25
+    assert restored.rarest_ore == "Ruby"
+    assert restored.auto_miner is True
+    assert sorted(item.name for item in restored.inventory) == ["Coal", "Coal", "Gold"]
+
+
+def test_states_with_modifiers_or_schedule_are_not_packed():
+    population = StatePopulation()
+    with_modifier = make_state()
+    with_modifier.modifiers.add(Modifier("luck", ADDITIVE, 1, "bless"))
+    with_effect = make_state()
+    with_effect.scheduler.at_dig(50, LuckyEventEffect())
+
+    for state in (with_modifier, with_effect):
+        with pytest.raises(ValueError):
+            population.append(state)
+    assert len(population) == 0
+
+    # Removed modifiers leave nothing to lose
+    with_modifier.modifiers.remove(source="bless")
+    population.append(with_modifier)
+
+
+def test_new_row_has_no_rarest_ore():
+    assert StatePopulation().new_row().rarest_ore == ""
+
+
+def test_row_size():
+    fixed = struct.calcsize("<qIdIIdqH?")
+    assert ROW_SIZE == fixed + 2 * len(CATALOG.ore_names)
+
+    population = StatePopulation()
+    for money in range(100):
+        population.append(make_state(money))
+    assert len(population._buffer) == 100 * ROW_SIZE
+
+
+def test_rows_are_an_order_of_magnitude_smaller_than_states():
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        states = [make_state(money) for money in range(500)]
+        per_state = (tracemalloc.get_traced_memory()[0] - before) / len(states)
+    finally:
+        tracemalloc.stop()
+    assert per_state > 10 * ROW_SIZE
@@ -0,0 +1,37 @@
+import random
+
+from modules.events import EquipmentFailureEvent, LuckyEvent
+from modules.items import ITEM_REGISTRY
+from modules.tournament import CapacityFirst, Simulation
+
+
+def test_simulation_replays_its_world_without_the_global_random():
+    random.seed(1)
+    expected = random.random()
+
+    random.seed(1)
+    first = Simulation(CapacityFirst(), 42).run(1)
+    assert random.random() == expected
+
+    second = Simulation(CapacityFirst(), 42).run(1)
+    assert (first.money, first.digs, first.income_rate) == (second.money, second.digs, second.income_rate)
+
+
+def test_empty_balance_alone_is_no_ruin():
+    simulation = Simulation(CapacityFirst(), 42)
+    simulation.state.money = 0
+    simulation._event(LuckyEvent)
+    assert not simulation.ruined
+
+    simulation.state.money = 0
+    simulation.state.inventory = [ITEM_REGISTRY["Diamond"]()]
+    simulation._event(EquipmentFailureEvent)
+    assert not simulation.ruined
+
+
+def test_unpaid_repair_ruins():
+    simulation = Simulation(CapacityFirst(), 42)
+    simulation.state.money = 5
+    simulation.state.inventory = []
+    simulation._event(EquipmentFailureEvent)
+    assert simulation.ruined